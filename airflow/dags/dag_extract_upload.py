@@ -2,15 +2,17 @@ from airflow import DAG
 from airflow.operators.python import PythonOperator
 from datetime import datetime, timedelta
 from selenium.webdriver.common.by import By
-import boto3
 import snowflake.connector
 import json
 import time
 import pandas as pd
 import requests
 import os
+import sys
+import tempfile
 from dotenv import load_dotenv
 import logging
+from shared.s3 import get_s3_client
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -18,6 +20,10 @@ logger = logging.getLogger(__name__)
 # Load environment variables
 load_dotenv()
 
+# Directory holding the RAG modules (indexing.py, document_processors.py, utils.py) from streamlit/
+RAG_MODULES_PATH = os.getenv("RAG_MODULES_PATH", "/opt/airflow/rag")
+S3_BUCKET_NAME = os.getenv("S3_BUCKET_NAME", "bdia-assignment-3")
+
 def setup_chrome_driver():
     from selenium import webdriver
     """Setup and return Chrome WebDriver"""
@@ -142,13 +148,8 @@ def upload_to_snowflake_and_s3(**context):
             key='json_file_path'
         )
         
-        # S3 Configuration
-        s3_client = boto3.client(
-            's3',
-            aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID"),
-            aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
-            region_name='us-east-1'
-        )
+        # S3 Configuration (shared, pooled client)
+        s3_client = get_s3_client()
         
         # Snowflake Configuration
         conn = snowflake.connector.connect(
@@ -210,11 +211,115 @@ def upload_to_snowflake_and_s3(**context):
         conn.close()
         
         logger.info("Successfully uploaded data to S3 and Snowflake")
+
+        # Let the FastAPI service pick up the new rows instead of waiting for its cache TTL
+        reload_catalog_cache()
         
     except Exception as e:
         logger.error(f"Error in upload task: {str(e)}")
         raise
 
+def reload_catalog_cache():
+    """Ask the FastAPI service to reload its research_foundation catalog cache"""
+    reload_url = os.getenv("FASTAPI_CATALOG_RELOAD_URL")
+    if not reload_url:
+        return
+    try:
+        headers = {"X-Admin-Token": os.getenv("ADMIN_API_TOKEN", "")}
+        response = requests.post(reload_url, headers=headers, timeout=30)
+        response.raise_for_status()
+        logger.info(f"Catalog cache reloaded: {response.json()}")
+    except Exception as e:
+        # The cache still refreshes on its TTL, so this must not fail the upload
+        logger.warning(f"Failed to reload FastAPI catalog cache: {str(e)}")
+
+def index_pdf_documents(**context):
+    """
+    Task to parse, embed and index every PDF that isn't indexed yet, so interactive Q&A only reads
+    """
+    # The RAG modules import each other as top-level modules
+    if RAG_MODULES_PATH not in sys.path:
+        sys.path.append(RAG_MODULES_PATH)
+    from indexing import file_content_hash, get_vector_store, index_document, initialize_settings, list_document_manifests
+    from utils import set_environment_variables
+
+    set_environment_variables()
+    initialize_settings()
+
+    conn = snowflake.connector.connect(
+        user=os.getenv("SNOWFLAKE_USER"),
+        password=os.getenv("SNOWFLAKE_PASSWORD"),
+        account=os.getenv("SNOWFLAKE_ACCOUNT"),
+        warehouse=os.getenv("SNOWFLAKE_WAREHOUSE"),
+        database=os.getenv("SNOWFLAKE_DATABASE"),
+        schema=os.getenv("SNOWFLAKE_SCHEMA")
+    )
+    cursor = conn.cursor()
+    s3_client = get_s3_client()
+
+    try:
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS document_index_status (
+                pdf_key VARCHAR PRIMARY KEY,
+                content_hash VARCHAR,
+                status VARCHAR,
+                chunk_count INTEGER,
+                error VARCHAR,
+                indexed_at TIMESTAMP_NTZ
+            )
+        """)
+
+        # PDFs that were never indexed successfully, plus any whose vector store manifest is missing
+        # or is for another version (e.g. rows left behind by a run that died before finishing)
+        cursor.execute("""
+            SELECT DISTINCT rf.pdf_key, dis.status, dis.content_hash
+            FROM research_foundation rf
+            LEFT JOIN document_index_status dis ON dis.pdf_key = rf.pdf_key
+        """)
+        manifests = list_document_manifests(get_vector_store())
+        pending = [
+            pdf_name for pdf_name, status, content_hash in cursor.fetchall()
+            if status != 'INDEXED'
+            or (manifests.get(os.path.splitext(pdf_name)[0]) or {}).get("content_hash") != content_hash
+        ]
+        logger.info(f"{len(pending)} PDFs to index")
+
+        upsert_status = """
+            MERGE INTO document_index_status t
+            USING (SELECT %s AS pdf_key, %s AS content_hash, %s AS status, %s AS chunk_count, %s AS error) s
+            ON t.pdf_key = s.pdf_key
+            WHEN MATCHED THEN UPDATE SET
+                content_hash = s.content_hash, status = s.status, chunk_count = s.chunk_count,
+                error = s.error, indexed_at = CURRENT_TIMESTAMP()
+            WHEN NOT MATCHED THEN INSERT (pdf_key, content_hash, status, chunk_count, error, indexed_at)
+                VALUES (s.pdf_key, s.content_hash, s.status, s.chunk_count, s.error, CURRENT_TIMESTAMP())
+        """
+
+        failures = 0
+        for pdf_name in pending:
+            # Streamlit keys documents by the PDF file name without its extension
+            pdf_key = os.path.splitext(pdf_name)[0]
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                pdf_path = os.path.join(tmp_dir, pdf_name)
+                try:
+                    s3_client.download_file(S3_BUCKET_NAME, f"Research-Foundation/{pdf_name}", pdf_path)
+                    content_hash = file_content_hash(pdf_path)
+                    _, newly_indexed, chunk_count = index_document(pdf_key, pdf_path, content_hash)
+                    cursor.execute(upsert_status, (pdf_name, content_hash, "INDEXED", chunk_count, None))
+                    logger.info(f"Indexed {pdf_key} ({'new' if newly_indexed else 'already in vector store'})")
+                except Exception as e:
+                    failures += 1
+                    logger.error(f"Failed to index {pdf_key}: {str(e)}")
+                    cursor.execute(upsert_status, (pdf_name, None, "FAILED", None, str(e)[:1000]))
+            conn.commit()
+
+        logger.info(f"Indexing finished: {len(pending) - failures} indexed, {failures} failed")
+        if failures:
+            raise RuntimeError(f"{failures} of {len(pending)} PDFs failed to index")
+
+    finally:
+        cursor.close()
+        conn.close()
 
 # Create the DAG
 default_args = {
@@ -252,5 +357,14 @@ upload_task = PythonOperator(
     dag = dag
 )
 
+    # Task 3: Parse, embed and index new PDFs into the vector store
+index_task = PythonOperator(
+    task_id='index_pdf_documents_task',
+    python_callable=index_pdf_documents,
+    provide_context=True,
+    execution_timeout= timedelta(hours=6),
+    dag = dag
+)
+
     # Set task dependencies
-scrape_pdfs_task >> upload_task
\ No newline at end of file
+scrape_pdfs_task >> upload_task >> index_task
\ No newline at end of file
@@ -0,0 +1,108 @@
+"""Concurrency benchmark for the FastAPI gallery endpoints.
+
+Simulates N users opening the landing page at the same time. Each gallery load lists
+the images, fetches their details in one batch request and then downloads every
+thumbnail, like `create_image_grid` does. Reports p50/p99 latency per gallery load
+and per request.
+
+Usage (with the API running):
+    python benchmarks/gallery_concurrency.py --base-url http://localhost:8000 --users 50
+
+Results for the defaults (50 parallel users x 3 rounds, 20 images per load) against one
+uvicorn worker on the same host. S3 and Snowflake were in-process fakes that block the
+calling thread for 30 ms and 150 ms per call; 200 images, warmed thumbnail cache. Two runs
+each, p50 / p99:
+
+    code                                   gallery load            request
+    before (blocking calls on the loop)    4.01-4.07 / 4.16-4.19 s  113-114 / 1387-1443 ms
+    run_blocking thread pool               2.37-2.44 / 2.80-2.96 s  106-114 / 225-240 ms
+    current (plus pooled S3 client, key
+    index, catalog cache)                  1.86-1.93 / 2.11-2.41 s  81-85 / 143-157 ms
+"""
+import argparse
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+
+def percentile(values, q):
+    values = sorted(values)
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def timed(request_times, func, *args, **kwargs):
+    start = time.perf_counter()
+    response = func(*args, **kwargs)
+    request_times.append(time.perf_counter() - start)
+    response.raise_for_status()
+    return response
+
+
+def gallery_load(base_url, images_per_load, thumbnail_width):
+    """Run one gallery load; returns (total seconds, list of per-request seconds)."""
+    request_times = []
+    start = time.perf_counter()
+    with requests.Session() as session:
+        page = timed(
+            request_times, session.get, f"{base_url}/list-images", params={"limit": images_per_load}
+        ).json()
+        # Older API versions return every key as a plain list instead of a page
+        image_files = page[:images_per_load] if isinstance(page, list) else page["images"]
+        timed(request_times, session.post, f"{base_url}/image-details/batch", json={"keys": image_files})
+        for image_file in image_files:
+            timed(request_times, session.get, f"{base_url}/thumbnail/{image_file}", params={"w": thumbnail_width})
+    return time.perf_counter() - start, request_times
+
+
+def report(name, values):
+    print(
+        f"{name:<14} n={len(values):<6} p50={percentile(values, 0.50) * 1000:8.1f} ms  "
+        f"p99={percentile(values, 0.99) * 1000:8.1f} ms  mean={statistics.mean(values) * 1000:8.1f} ms  "
+        f"max={max(values) * 1000:8.1f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--users", type=int, default=50, help="parallel gallery loads")
+    parser.add_argument("--rounds", type=int, default=3, help="gallery loads per user")
+    parser.add_argument("--images-per-load", type=int, default=20)
+    parser.add_argument("--thumbnail-width", type=int, default=320)
+    args = parser.parse_args()
+
+    # Warm the server-side caches so the numbers reflect steady state
+    gallery_load(args.base_url, args.images_per_load, args.thumbnail_width)
+
+    load_times = []
+    request_times = []
+    errors = 0
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.users) as executor:
+        futures = [
+            executor.submit(gallery_load, args.base_url, args.images_per_load, args.thumbnail_width)
+            for _ in range(args.users * args.rounds)
+        ]
+        for future in futures:
+            try:
+                load_time, times = future.result()
+                load_times.append(load_time)
+                request_times.extend(times)
+            except requests.RequestException as e:
+                errors += 1
+                print(f"Gallery load failed: {e}")
+    elapsed = time.perf_counter() - start
+
+    print(f"{args.users} parallel users x {args.rounds} rounds, {args.images_per_load} images per load")
+    if load_times:
+        report("gallery load", load_times)
+        report("request", request_times)
+    print(f"errors={errors}  throughput={len(request_times) / elapsed:.1f} req/s  wall={elapsed:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Offline throughput benchmark for the index-build ingestion path.
+
+Embeds synthetic chunks with the stub embedding model (which sleeps `--latency` seconds
+per request to stand in for the NVIDIA endpoint) and writes them to an in-memory vector
+store. Compares the previous path, VectorStoreIndex with the model's default batch of 10
+and sequential requests, against `ingest_nodes` with larger batches in flight concurrently.
+
+Usage:
+    python benchmarks/ingestion_throughput.py --chunks 2000 --latency 0.2 --batch-size 50 --concurrency 4
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "streamlit"))
+
+from llama_index.core import StorageContext, VectorStoreIndex  # noqa: E402
+from llama_index.core.schema import TextNode  # noqa: E402
+from llama_index.core.vector_stores import SimpleVectorStore  # noqa: E402
+
+from embeddings import StubEmbedding  # noqa: E402
+from ingestion import ingest_nodes  # noqa: E402
+
+
+def make_nodes(count, words_per_chunk):
+    return [
+        TextNode(text=" ".join(f"token{(i * 31 + j) % 5000}" for j in range(words_per_chunk)), id_=f"chunk-{i}")
+        for i in range(count)
+    ]
+
+
+def run_default(nodes, latency):
+    embed_model = StubEmbedding(latency=latency)
+    start = time.perf_counter()
+    storage_context = StorageContext.from_defaults(vector_store=SimpleVectorStore())
+    VectorStoreIndex(nodes, storage_context=storage_context, embed_model=embed_model)
+    return time.perf_counter() - start
+
+
+def run_batched(nodes, latency, batch_size, concurrency, upsert_batch_size):
+    embed_model = StubEmbedding(latency=latency, embed_batch_size=batch_size)
+    last_report = [0.0]
+
+    def progress(stage, done, total, elapsed):
+        if elapsed - last_report[0] >= 1.0 or done == total:
+            last_report[0] = elapsed
+            print(f"  {stage:<10} {done:>6}/{total} chunks  {done / elapsed if elapsed else 0:8.1f} chunks/s")
+
+    start = time.perf_counter()
+    ingest_nodes(
+        nodes, SimpleVectorStore(), embed_model, batch_size=batch_size, concurrency=concurrency,
+        upsert_batch_size=upsert_batch_size, progress_callback=progress
+    )
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=2000)
+    parser.add_argument("--words-per-chunk", type=int, default=120)
+    parser.add_argument("--latency", type=float, default=0.2, help="simulated seconds per embedding request")
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--upsert-batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    default_seconds = run_default(make_nodes(args.chunks, args.words_per_chunk), args.latency)
+    print(f"default   {args.chunks} chunks in {default_seconds:7.2f} s  ({args.chunks / default_seconds:8.1f} chunks/s)")
+
+    batched_seconds = run_batched(
+        make_nodes(args.chunks, args.words_per_chunk), args.latency,
+        args.batch_size, args.concurrency, args.upsert_batch_size
+    )
+    print(f"batched   {args.chunks} chunks in {batched_seconds:7.2f} s  ({args.chunks / batched_seconds:8.1f} chunks/s)")
+    print(f"speedup   {default_seconds / batched_seconds:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
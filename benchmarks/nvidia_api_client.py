@@ -0,0 +1,163 @@
+"""Shared NVIDIA API client against a local mock of the NVIDIA endpoints.
+
+Starts an HTTP/1.1 server on localhost that answers chat requests like the `vlm/...`
+endpoints after `--latency` seconds. It enforces a quota of `--quota` requests per second
+(429 with Retry-After beyond it) and fails `--error-rate` of the remaining requests with a
+503. `--calls` descriptions are then requested from `--threads` threads, as the ingestion
+describe pool does. The run is done twice: once with a bare `requests.post` per call (the
+previous code) and once through `nvidia_client.NVIDIAClient`. Reports wall time,
+successful calls, failed calls, retries and TCP connections opened.
+
+The unit-level behaviour (retries, Retry-After, token bucket, concurrency cap) can be
+exercised the same way: point NVIDIA_API_BASE_URL at the mock server.
+
+Usage:
+    python benchmarks/nvidia_api_client.py --calls 200 --threads 8 --quota 20
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "streamlit"))
+
+from nvidia_client import NVIDIAClient  # noqa: E402
+
+
+class MockNVIDIAServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, latency, quota, error_rate):
+        super().__init__(("127.0.0.1", 0), MockNVIDIAHandler)
+        self.latency = latency
+        self.quota = quota
+        self.error_rate = error_rate
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.requests = 0
+        self.window = (0, 0)
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def get_request(self):
+        request = super().get_request()
+        with self.lock:
+            self.connections += 1
+        return request
+
+    def admit(self):
+        """Return the status to answer with: 429 over the per-second quota, 503 for injected errors."""
+        with self.lock:
+            self.requests += 1
+            second = int(time.monotonic())
+            window_second, count = self.window
+            count = count + 1 if window_second == second else 1
+            self.window = (second, count)
+            if self.quota and count > self.quota:
+                return 429
+            if self.error_rate and (self.requests * self.error_rate) % 1 < self.error_rate:
+                return 503
+            return 200
+
+
+class MockNVIDIAHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        status = self.server.admit()
+        headers = {"Content-Type": "application/json"}
+        if status == 200:
+            time.sleep(self.server.latency)
+            content = f"Description of {len(payload['messages'][0]['content'])} characters of input"
+            body = json.dumps({"choices": [{"message": {"role": "assistant", "content": content}}]})
+        else:
+            body = json.dumps({"detail": "Too Many Requests" if status == 429 else "Service Unavailable"})
+            if status == 429:
+                headers["Retry-After"] = "1"
+        body = body.encode("utf-8")
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def request_payload(i):
+    return {"messages": [{"role": "user", "content": f"Describe image {i}"}], "max_tokens": 1024, "stream": False}
+
+
+def call_with_requests(server, i):
+    response = requests.post(
+        f"{server.base_url}/vlm/nvidia/neva-22b", json=request_payload(i),
+        headers={"Authorization": "Bearer mock", "Accept": "application/json"}
+    )
+    response.raise_for_status()
+    return response.json()["choices"][0]["message"]["content"]
+
+
+def run(name, server, call, calls, threads, stats=None):
+    with server.lock:
+        server.connections = 0
+    failures = 0
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        futures = [executor.submit(call, i) for i in range(calls)]
+        for future in futures:
+            try:
+                future.result()
+            except Exception:
+                failures += 1
+    elapsed = time.perf_counter() - start
+    retries = stats()["retries"] if stats else 0
+    print(
+        f"{name:<16} wall={elapsed:7.2f} s  ok={calls - failures:5d}  failed={failures:5d}  "
+        f"retries={retries:5d}  connections={server.connections:5d}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--quota", type=int, default=20, help="requests per second before the mock answers 429")
+    parser.add_argument("--error-rate", type=float, default=0.05, help="fraction of admitted requests answered with 503")
+    parser.add_argument("--rate-limit", type=float, default=None, help="client token bucket rate (defaults to --quota)")
+    args = parser.parse_args()
+
+    server = MockNVIDIAServer(args.latency, args.quota, args.error_rate)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"{args.calls} calls from {args.threads} threads, quota={args.quota}/s, error rate={args.error_rate}")
+    try:
+        run("requests.post", server, lambda i: call_with_requests(server, i), args.calls, args.threads)
+
+        client = NVIDIAClient(
+            base_url=server.base_url, api_key="mock", max_concurrency=args.threads,
+            rate_limit=args.rate_limit if args.rate_limit is not None else args.quota, burst=args.quota
+        )
+        try:
+            run(
+                "NVIDIAClient", server, lambda i: client.post("vlm/nvidia/neva-22b", request_payload(i)),
+                args.calls, args.threads, client.stats
+            )
+        finally:
+            client.close()
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
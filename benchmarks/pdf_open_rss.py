@@ -0,0 +1,120 @@
+"""Peak memory benchmark for opening a PDF: plain file reads against the shared document handle.
+
+Each mode runs in a fresh subprocess that does what the Q&A page does for `--sessions`
+concurrent sessions viewing one document: hash the file, count its pages with PyMuPDF and
+build the viewer payload (the bytes plus the base64 string `pdf_viewer` sends to the
+browser). "read" is the previous code path (`open().read()` per session); "handle" goes
+through `document_handle.open_document` (mmap-backed hash, one shared viewer copy). Reports peak RSS above the post-import baseline,
+in total and per session, and splits the resident set at the end into private memory and
+file-backed pages (the hash mapping, which lives in the shared, reclaimable page cache).
+
+Without `--pdf` a synthetic document of `--size-mb` incompressible bytes is generated.
+
+Usage:
+    python benchmarks/pdf_open_rss.py --size-mb 40 --sessions 4
+    python benchmarks/pdf_open_rss.py --pdf path/to/monograph.pdf
+"""
+import argparse
+import base64
+import hashlib
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+
+STREAMLIT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "streamlit")
+
+
+def make_pdf(path, size_mb, pages=200):
+    import fitz
+
+    doc = fitz.open()
+    for i in range(pages):
+        doc.new_page().insert_text((72, 72), f"Synthetic page {i + 1}")
+    # Random bytes don't compress, so the file ends up close to the requested size
+    doc.embfile_add("payload.bin", os.urandom(size_mb * 1024 * 1024))
+    doc.save(path)
+    doc.close()
+
+
+def rss_kb(field="VmRSS"):
+    """Resident memory from /proc/self/status: VmRSS in total, RssAnon private, RssFile page-cache backed."""
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(field + ":"):
+                return int(line.split()[1])
+    return 0
+
+
+def run_mode(mode, pdf_path, sessions):
+    """Body of the subprocess; prints baseline, peak, private and file-backed RSS in KiB."""
+    import fitz
+
+    sys.path.append(STREAMLIT_DIR)
+    from document_handle import open_document
+
+    baseline = rss_kb()
+    baseline_anon, baseline_file = rss_kb("RssAnon"), rss_kb("RssFile")
+    payloads = []
+    for _ in range(sessions):
+        if mode == "read":
+            sha256 = hashlib.sha256()
+            with open(pdf_path, "rb") as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                    sha256.update(chunk)
+            with fitz.open(pdf_path) as doc:
+                len(doc)
+            with open(pdf_path, "rb") as f:
+                content = f.read()
+        else:
+            handle = open_document(pdf_path)
+            handle.sha256()
+            handle.page_count()
+            content = handle.viewer_bytes()
+        # Sessions render concurrently, so every session's payload is alive at the peak
+        payloads.append((content, base64.b64encode(content).decode("utf-8")))
+    print(
+        baseline, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        rss_kb("RssAnon") - baseline_anon, rss_kb("RssFile") - baseline_file
+    )
+
+
+def measure(mode, pdf_path, sessions):
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--child", mode, "--pdf", pdf_path, "--sessions", str(sessions)],
+        check=True, capture_output=True, text=True
+    ).stdout.split()
+    baseline, peak, anon, file_backed = (int(value) for value in output)
+    return max(peak - baseline, 0) / 1024, anon / 1024, file_backed / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pdf", help="PDF to open; a synthetic one is generated when omitted")
+    parser.add_argument("--size-mb", type=int, default=40)
+    parser.add_argument("--sessions", type=int, default=4)
+    parser.add_argument("--child", choices=["read", "handle"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_mode(args.child, args.pdf, args.sessions)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        pdf_path = args.pdf
+        if pdf_path is None:
+            pdf_path = os.path.join(tmp_dir, "synthetic.pdf")
+            make_pdf(pdf_path, args.size_mb)
+        size_mb = os.path.getsize(pdf_path) / (1024 * 1024)
+        print(f"{pdf_path}: {size_mb:.1f} MiB, {args.sessions} sessions")
+        for mode in ("read", "handle"):
+            peak_mb, anon_mb, file_mb = measure(mode, pdf_path, args.sessions)
+            print(
+                f"{mode:<6} peak RSS={peak_mb:8.1f} MiB  per session={peak_mb / args.sessions:7.1f} MiB  "
+                f"private={anon_mb:8.1f} MiB  file-backed={file_mb:7.1f} MiB"
+            )
+
+
+if __name__ == "__main__":
+    main()
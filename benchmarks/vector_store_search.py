@@ -0,0 +1,122 @@
+"""Search benchmark for the local vector store against the Zilliz/Milvus path.
+
+Builds one synthetic document of `--chunks` clustered unit vectors and runs `--queries`
+top-k searches scoped to it (the same pdf_key filter the Q&A page uses). The local store
+is measured with exact brute-force search and with its IVF index. With `--milvus` the
+same data goes into a scratch collection on ZILLIZ_CLOUD_URI for comparison. Reports
+insert time, p50/p99 query latency and recall@k against exact search.
+
+Usage:
+    python benchmarks/vector_store_search.py --chunks 50000 --queries 200
+    python benchmarks/vector_store_search.py --chunks 5000 --milvus
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "streamlit"))
+
+from llama_index.core.schema import TextNode  # noqa: E402
+from llama_index.core.vector_stores.types import ExactMatchFilter, MetadataFilters, VectorStoreQuery  # noqa: E402
+
+from local_vector_store import LocalVectorStore, top_k  # noqa: E402
+
+PDF_KEY = "benchmark-document"
+
+
+def percentile(values, q):
+    values = sorted(values)
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def make_vectors(count, dim, clusters, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim))
+    vectors = centers[rng.integers(0, clusters, count)] + 0.8 * rng.standard_normal((count, dim))
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+
+def make_queries(vectors, count, seed=1):
+    rng = np.random.default_rng(seed)
+    queries = vectors[rng.integers(0, len(vectors), count)] + 0.3 * rng.standard_normal((count, vectors.shape[1]))
+    return (queries / np.linalg.norm(queries, axis=1, keepdims=True)).astype(np.float32)
+
+
+def make_nodes(vectors):
+    nodes = []
+    for i, vector in enumerate(vectors):
+        node = TextNode(text=f"chunk {i}", id_=f"chunk-{i}", metadata={"pdf_key": PDF_KEY})
+        node.embedding = vector.tolist()
+        nodes.append(node)
+    return nodes
+
+
+def run(name, vector_store, nodes, queries, exact, k, batch_size=1000):
+    start = time.perf_counter()
+    for i in range(0, len(nodes), batch_size):
+        vector_store.add(nodes[i:i + batch_size])
+    insert_seconds = time.perf_counter() - start
+
+    filters = MetadataFilters(filters=[ExactMatchFilter(key="pdf_key", value=PDF_KEY)])
+    # First query pays one-off costs (IVF build, collection load); keep it out of the percentiles
+    vector_store.query(VectorStoreQuery(query_embedding=queries[0].tolist(), similarity_top_k=k, filters=filters))
+
+    latencies = []
+    recall = 0.0
+    for query, expected in zip(queries, exact):
+        start = time.perf_counter()
+        result = vector_store.query(VectorStoreQuery(query_embedding=query.tolist(), similarity_top_k=k, filters=filters))
+        latencies.append(time.perf_counter() - start)
+        recall += len(expected & set(result.ids)) / k
+    print(
+        f"{name:<14} insert={insert_seconds:7.2f} s  p50={percentile(latencies, 0.50) * 1000:8.2f} ms  "
+        f"p99={percentile(latencies, 0.99) * 1000:8.2f} ms  recall@{k}={recall / len(queries):.3f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=50000)
+    parser.add_argument("--dim", type=int, default=1024)
+    parser.add_argument("--clusters", type=int, default=200)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--nprobe", type=int, default=16)
+    parser.add_argument("--milvus", action="store_true", help="also benchmark a scratch Zilliz/Milvus collection")
+    args = parser.parse_args()
+
+    vectors = make_vectors(args.chunks, args.dim, args.clusters)
+    queries = make_queries(vectors, args.queries)
+    exact = [{f"chunk-{i}" for i in top_k(vectors @ query, args.top_k)} for query in queries]
+    nodes = make_nodes(vectors)
+    print(f"{args.chunks} chunks x {args.dim} dims, {args.queries} queries, top_k={args.top_k}")
+
+    with tempfile.TemporaryDirectory() as brute_dir, tempfile.TemporaryDirectory() as ivf_dir:
+        run("local brute", LocalVectorStore(path=brute_dir, ivf_min_rows=args.chunks + 1), nodes, queries, exact, args.top_k)
+        run("local ivf", LocalVectorStore(path=ivf_dir, ivf_min_rows=0, nprobe=args.nprobe), nodes, queries, exact, args.top_k)
+
+    if args.milvus:
+        from llama_index.vector_stores.milvus import MilvusVectorStore
+
+        milvus = MilvusVectorStore(
+            uri=os.getenv("ZILLIZ_CLOUD_URI"),
+            user=os.getenv("ZILLIZ_CLOUD_USER"),
+            password=os.getenv("ZILLIZ_CLOUD_PASSWORD"),
+            collection_name="Assignment3_benchmark",
+            dim=args.dim,
+            overwrite=True
+        )
+        try:
+            run("milvus", milvus, nodes, queries, exact, args.top_k)
+        finally:
+            milvus.client.drop_collection("Assignment3_benchmark")
+
+
+if __name__ == "__main__":
+    main()
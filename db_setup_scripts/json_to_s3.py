@@ -1,17 +1,19 @@
 import os
+import sys
 import json
-import boto3
 import requests
 import pandas as pd
 from dotenv import load_dotenv
 import snowflake.connector
 
+# Make the repository root importable so the shared S3 module can be used when run as a script
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from shared.s3 import get_s3_client
+
 load_dotenv()
 
 json_file_path = r'tmp\scraped_data.json'
 AWS_LINK = 'https://bdia-assignment-3.s3.us-east-1.amazonaws.com'
-AWS_ACCESS_KEY_ID = os.getenv("AWS_ACCESS_KEY_ID")
-AWS_SECRET_ACCESS_KEY = os.getenv("AWS_SECRET_ACCESS_KEY")
 SNOWFLAKE_USER = os.getenv("SNOWFLAKE_USER")
 SNOWFLAKE_PASSWORD = os.getenv("SNOWFLAKE_PASSWORD")
 SNOWFLAKE_ACCOUNT = os.getenv("SNOWFLAKE_ACCOUNT")
@@ -21,12 +23,7 @@ SNOWFLAKE_SCHEMA = os.getenv("SNOWFLAKE_SCHEMA")
 S3_BUCKET_NAME = "bdia-assignment-3"
 S3_FOLDER_NAME = 'Research-Foundation'
 
-s3_client = boto3.client(
-    's3',
-    aws_access_key_id=AWS_ACCESS_KEY_ID,
-    aws_secret_access_key=AWS_SECRET_ACCESS_KEY,
-    region_name='us-east-1'
-)
+s3_client = get_s3_client()
 
 conn = snowflake.connector.connect(
     user=SNOWFLAKE_USER,
@@ -1,12 +1,25 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException, Query
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel
-import snowflake.connector
-import boto3
+from typing import List, Optional
+from botocore.exceptions import ClientError
 from io import BytesIO
 from PIL import Image
 import base64
 import os
+import asyncio
+import functools
+import mimetypes
+import secrets
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import formatdate
 from dotenv import load_dotenv
+from shared.s3 import get_s3_client
+from fast_api.db_pool import SnowflakeConnectionPool, PoolTimeoutError
+from fast_api.catalog_cache import CatalogCache
+from fast_api.disk_cache import DiskLRUCache
+from fast_api.key_index import S3KeyIndex
+from fast_api.thumbnails import THUMBNAIL_FORMATS, make_thumbnail, snap_width, thumbnail_etag, thumbnail_key
 
 # Load environment variables
 load_dotenv()
@@ -15,9 +28,7 @@ load_dotenv()
 app = FastAPI()
 
 # AWS and Snowflake credentials from environment variables
-AWS_ACCESS_KEY_ID = os.getenv("AWS_ACCESS_KEY_ID")
-AWS_SECRET_ACCESS_KEY = os.getenv("AWS_SECRET_ACCESS_KEY")
-AWS_REGION = os.getenv("AWS_REGION")
+# (the shared S3 client reads AWS_ACCESS_KEY_ID, AWS_SECRET_ACCESS_KEY and AWS_REGION itself)
 S3_BUCKET_NAME = os.getenv("S3_BUCKET_NAME")
 
 SNOWFLAKE_USER = os.getenv("SNOWFLAKE_USER")
@@ -27,26 +38,94 @@ SNOWFLAKE_WAREHOUSE = os.getenv("SNOWFLAKE_WAREHOUSE")
 SNOWFLAKE_DATABASE = os.getenv("SNOWFLAKE_DATABASE")
 SNOWFLAKE_SCHEMA = os.getenv("SNOWFLAKE_SCHEMA")
 
-# Helper function to connect to S3
-def get_s3_client():
-    return boto3.client(
-        "s3",
-        aws_access_key_id=AWS_ACCESS_KEY_ID,
-        aws_secret_access_key=AWS_SECRET_ACCESS_KEY,
-        region_name=AWS_REGION
+# Snowflake connection pool sizing
+SNOWFLAKE_POOL_MIN_SIZE = int(os.getenv("SNOWFLAKE_POOL_MIN_SIZE", "1"))
+SNOWFLAKE_POOL_MAX_SIZE = int(os.getenv("SNOWFLAKE_POOL_MAX_SIZE", "5"))
+SNOWFLAKE_POOL_TIMEOUT = float(os.getenv("SNOWFLAKE_POOL_TIMEOUT", "30"))
+SNOWFLAKE_POOL_HEALTH_CHECK_INTERVAL = float(os.getenv("SNOWFLAKE_POOL_HEALTH_CHECK_INTERVAL", "300"))
+
+# Browser/HTTP cache lifetime for images served from S3, and the streaming chunk size
+IMAGE_CACHE_MAX_AGE = int(os.getenv("IMAGE_CACHE_MAX_AGE", "86400"))
+IMAGE_STREAM_CHUNK_SIZE = 64 * 1024
+
+# Gallery thumbnail encoding and the size-bounded local disk cache for them
+THUMBNAIL_FORMAT = os.getenv("THUMBNAIL_FORMAT", "WEBP").upper()
+THUMBNAIL_CACHE_DIR = os.getenv("THUMBNAIL_CACHE_DIR", "/tmp/thumbnail_cache")
+THUMBNAIL_CACHE_MAX_BYTES = int(os.getenv("THUMBNAIL_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+
+# Size of the dedicated thread pool that runs blocking boto3/Snowflake calls off the event loop
+BLOCKING_IO_WORKERS = int(os.getenv("BLOCKING_IO_WORKERS", "32"))
+
+# Image listing: S3 prefix, default extensions, page sizes and key index refresh interval
+IMAGE_PREFIX = "Research-Foundation/"
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg")
+LIST_IMAGES_DEFAULT_LIMIT = 100
+LIST_IMAGES_MAX_LIMIT = 1000
+IMAGE_INDEX_TTL = float(os.getenv("IMAGE_INDEX_TTL", "300"))
+
+# research_foundation catalog cache refresh interval, and the token the admin endpoints require
+# (they refuse every request while it is unset)
+CATALOG_CACHE_TTL = float(os.getenv("CATALOG_CACHE_TTL", "3600"))
+ADMIN_API_TOKEN = os.getenv("ADMIN_API_TOKEN")
+
+# Create the shared Snowflake connection pool and catalog cache once, at app startup
+@app.on_event("startup")
+def create_db_pool():
+    app.state.io_executor = ThreadPoolExecutor(max_workers=BLOCKING_IO_WORKERS, thread_name_prefix="blocking-io")
+
+    # Build the shared S3 client up front so the first request doesn't pay for it
+    get_s3_client()
+
+    app.state.db_pool = SnowflakeConnectionPool(
+        connect_kwargs={
+            "user": SNOWFLAKE_USER,
+            "password": SNOWFLAKE_PASSWORD,
+            "account": SNOWFLAKE_ACCOUNT,
+            "warehouse": SNOWFLAKE_WAREHOUSE,
+            "database": SNOWFLAKE_DATABASE,
+            "schema": SNOWFLAKE_SCHEMA,
+        },
+        min_size=SNOWFLAKE_POOL_MIN_SIZE,
+        max_size=SNOWFLAKE_POOL_MAX_SIZE,
+        timeout=SNOWFLAKE_POOL_TIMEOUT,
+        health_check_interval=SNOWFLAKE_POOL_HEALTH_CHECK_INTERVAL,
     )
 
-# Helper function to connect to Snowflake
+    app.state.catalog_cache = CatalogCache(loader=query_catalog_rows, ttl=CATALOG_CACHE_TTL)
+    try:
+        entries = app.state.catalog_cache.reload()
+        print(f"Catalog cache loaded {entries} entries")
+    except Exception as e:
+        # Lookups fall back to Snowflake and retry the load lazily
+        print(f"Catalog cache initial load failed: {e}")
+    app.state.catalog_cache.start_auto_refresh()
+
+    app.state.thumbnail_cache = DiskLRUCache(THUMBNAIL_CACHE_DIR, THUMBNAIL_CACHE_MAX_BYTES)
+
+    app.state.image_key_index = S3KeyIndex(get_s3_client, S3_BUCKET_NAME, IMAGE_PREFIX, ttl=IMAGE_INDEX_TTL)
+    try:
+        keys = app.state.image_key_index.refresh()
+        print(f"S3 key index loaded {keys} keys")
+    except Exception as e:
+        # The first /list-images call retries the listing
+        print(f"S3 key index initial load failed: {e}")
+    app.state.image_key_index.start_auto_refresh()
+
+@app.on_event("shutdown")
+def close_db_pool():
+    app.state.catalog_cache.stop()
+    app.state.image_key_index.stop()
+    app.state.db_pool.close()
+    app.state.io_executor.shutdown(wait=False)
+
+# Helper function to run a blocking S3/Snowflake call on the I/O thread pool so handlers never stall the event loop
+async def run_blocking(func, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(app.state.io_executor, functools.partial(func, *args, **kwargs))
+
+# Helper function to check out a pooled Snowflake connection (use as a context manager)
 def get_db_connection():
-    connection = snowflake.connector.connect(
-        user=SNOWFLAKE_USER,
-        password=SNOWFLAKE_PASSWORD,
-        account=SNOWFLAKE_ACCOUNT,
-        warehouse=SNOWFLAKE_WAREHOUSE,
-        database=SNOWFLAKE_DATABASE,
-        schema=SNOWFLAKE_SCHEMA
-    )
-    return connection
+    return app.state.db_pool.connection()
 
 # Pydantic model for Image Metadata
 class ImageMetadata(BaseModel):
@@ -54,103 +133,305 @@ class ImageMetadata(BaseModel):
     brief: str
     pdf_key: str
 
+# Pydantic model for the batch image details request
+class ImageDetailsBatchRequest(BaseModel):
+    keys: List[str]
+
+# Snowflake limits the number of bind parameters per statement, so large batches are chunked
+IMAGE_DETAILS_BATCH_CHUNK_SIZE = 500
 
-# API to fetch image metadata from Snowflake
+CATALOG_COLUMNS = ("pdf_key", "title", "image_link", "pdf_link", "pdf_summary")
+
+# Helper function to read catalog rows from Snowflake, either all of them or by image link
+def query_catalog_rows(image_links=None):
+    rows = []
+    base_query = f"SELECT {', '.join(CATALOG_COLUMNS)} FROM research_foundation"
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        try:
+            if image_links is None:
+                cursor.execute(base_query)
+                rows.extend(cursor.fetchall())
+            else:
+                image_links = list(image_links)
+                for start in range(0, len(image_links), IMAGE_DETAILS_BATCH_CHUNK_SIZE):
+                    chunk = image_links[start:start + IMAGE_DETAILS_BATCH_CHUNK_SIZE]
+                    placeholders = ", ".join(["%s"] * len(chunk))
+                    cursor.execute(f"{base_query} WHERE image_link IN ({placeholders})", tuple(chunk))
+                    rows.extend(cursor.fetchall())
+        finally:
+            cursor.close()
+    return [dict(zip(CATALOG_COLUMNS, row)) for row in rows]
+
+# Helper function to resolve image links from the catalog cache, querying Snowflake only when it can't load
+def lookup_catalog_rows(image_links):
+    cache = app.state.catalog_cache
+    try:
+        # The loaded catalog holds the whole table, so misses (e.g. image-not-available.png) are final
+        return {image_link: row for image_link in image_links if (row := cache.get_by_image_link(image_link)) is not None}
+    except Exception as e:
+        print(f"Catalog cache unavailable, querying Snowflake: {e}")
+    return {row["image_link"]: row for row in query_catalog_rows(image_links)}
+
+# API to fetch image metadata from the catalog cache (backed by Snowflake)
 S3_BASE_URL = "https://bdia-assignment-3.s3.us-east-1.amazonaws.com/"
 
 @app.get("/image-details/{pdf_key:path}")
 async def get_image_details(pdf_key: str):
     try:
-        # Establish a database connection
-        conn = get_db_connection()
-        cursor = conn.cursor()
-
         # Construct the full image link URL
         full_image_link = f"{S3_BASE_URL}{pdf_key}"
-
-        # Query the Snowflake database to retrieve title and pdf_summary where image_link matches
-        query = "SELECT title, pdf_summary, pdf_key FROM research_foundation WHERE image_link = %s"
-        cursor.execute(query, (full_image_link,))
-        result = cursor.fetchone()
+        result = (await run_blocking(lookup_catalog_rows, [full_image_link])).get(full_image_link)
 
         if result:
-            title, brief, pdf_key_value = result
-            return {"title": title, "pdf_summary": brief, "pdf_key": pdf_key_value}
+            return {"title": result["title"], "pdf_summary": result["pdf_summary"], "pdf_key": result["pdf_key"]}
         else:
             #logger.warning(f"No details found for image link: {full_image_link}")
             raise HTTPException(status_code=404, detail="Image details not found")
 
+    except HTTPException:
+        raise
+
+    except PoolTimeoutError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
     except Exception as e:
         #logger.error("Error retrieving image details", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Error retrieving image details: {str(e)}")
 
-    finally:
-        if cursor:
-            cursor.close()
-        if conn:
-            conn.close()
+# API to fetch metadata for many images in one round trip
+@app.post("/image-details/batch")
+async def get_image_details_batch(request: ImageDetailsBatchRequest):
+    # Map full image links back to the keys the client asked for
+    links_to_keys = {f"{S3_BASE_URL}{key}": key for key in dict.fromkeys(request.keys)}
+    try:
+        rows = await run_blocking(lookup_catalog_rows, list(links_to_keys))
+        return {
+            links_to_keys[image_link]: {"title": row["title"], "pdf_summary": row["pdf_summary"], "pdf_key": row["pdf_key"]}
+            for image_link, row in rows.items()
+        }
+
+    except PoolTimeoutError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error retrieving image details: {str(e)}")
+
+# Helper function to guard admin endpoints; they stay closed until ADMIN_API_TOKEN is configured
+def check_admin_token(x_admin_token):
+    if not ADMIN_API_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled: ADMIN_API_TOKEN is not set")
+    if x_admin_token is None or not secrets.compare_digest(x_admin_token, ADMIN_API_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+# Admin API to reload the catalog cache, e.g. after the Airflow upload task has run
+@app.post("/admin/catalog-cache/reload")
+async def reload_catalog_cache(x_admin_token: Optional[str] = Header(None)):
+    check_admin_token(x_admin_token)
+    try:
+        entries = await run_blocking(app.state.catalog_cache.reload)
+        return {"status": "reloaded", "entries": entries}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error reloading catalog cache: {str(e)}")
+
+# Admin API to drop the catalog cache; the next lookup reloads it
+@app.delete("/admin/catalog-cache")
+async def invalidate_catalog_cache(x_admin_token: Optional[str] = Header(None)):
+    check_admin_token(x_admin_token)
+    app.state.catalog_cache.invalidate()
+    return {"status": "invalidated"}
+
+# API to report catalog cache hit/miss counters
+@app.get("/metrics/catalog-cache")
+async def catalog_cache_metrics():
+    return app.state.catalog_cache.stats()
+
+# API to report Snowflake connection pool size and checkout wait times
+@app.get("/metrics/db-pool")
+async def db_pool_metrics():
+    return app.state.db_pool.stats()
+
+# Helper function to load an S3 image and re-encode it as base64 JSON
+def load_image_base64(s3, image_key):
+    image_object = s3.get_object(Bucket=S3_BUCKET_NAME, Key=image_key)
+    image_data = image_object['Body'].read()
+
+    # Open the image and check its format
+    img = Image.open(BytesIO(image_data))
+    img_format = img.format  # Original format (e.g., PNG, JPEG)
+
+    # Convert CMYK images to RGB to ensure compatibility with PNG or JPEG
+    if img.mode == "CMYK":
+        img = img.convert("RGB")
+
+    # Prepare buffer for image data
+    buffered = BytesIO()
+    img.save(buffered, format=img_format if img_format in ["PNG", "JPEG"] else "PNG")
+    img_base64 = base64.b64encode(buffered.getvalue()).decode("utf-8")
+
+    return {"image_base64": img_base64, "format": img_format}
 
 # API to fetch image data from S3 and return as base64
+# Kept for older clients; new clients should use /image/{image_key}, which streams the raw bytes
 @app.get("/fetch-image/{pdf_key:path}")
 async def fetch_image(pdf_key: str):
-    s3 = get_s3_client()
     try:
-        print(pdf_key)
-        image_object = s3.get_object(Bucket=S3_BUCKET_NAME, Key=pdf_key)
-        image_data = image_object['Body'].read()
+        s3 = get_s3_client()
+        try:
+            return await run_blocking(load_image_base64, s3, pdf_key)
+        except s3.exceptions.NoSuchKey:
+            # Load a placeholder image if the original is not found
+            return await run_blocking(load_image_base64, s3, PLACEHOLDER_IMAGE_KEY)
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching image from S3: {str(e)}")
+
+PLACEHOLDER_IMAGE_KEY = "Research-Foundation/image-not-available.png"
+
+# Helper function to pick the Content-Type for an S3 object (uploads often lack one)
+def image_media_type(image_key, s3_object):
+    content_type = s3_object.get("ContentType")
+    if content_type and content_type not in ("binary/octet-stream", "application/octet-stream"):
+        return content_type
+    return mimetypes.guess_type(image_key)[0] or "application/octet-stream"
+
+# Helper function to build HTTP caching headers from S3 object metadata
+def image_cache_headers(s3_object):
+    headers = {"Cache-Control": f"public, max-age={IMAGE_CACHE_MAX_AGE}"}
+    if s3_object.get("ETag"):
+        headers["ETag"] = s3_object["ETag"]
+    if s3_object.get("LastModified"):
+        headers["Last-Modified"] = formatdate(s3_object["LastModified"].timestamp(), usegmt=True)
+    return headers
+
+# Helper function to stream an S3 body in chunks, reading each chunk on the I/O thread pool
+async def stream_s3_body(body):
+    try:
+        while True:
+            chunk = await run_blocking(body.read, IMAGE_STREAM_CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        body.close()
 
-        # Open the image and check its format
-        img = Image.open(BytesIO(image_data))
-        img_format = img.format  # Original format (e.g., PNG, JPEG)
+# API to stream raw image bytes from S3 with HTTP caching headers
+@app.get("/image/{image_key:path}")
+async def get_image(image_key: str, if_none_match: Optional[str] = Header(None)):
+    get_kwargs = {"Bucket": S3_BUCKET_NAME, "Key": image_key}
+    if if_none_match:
+        # Let S3 evaluate the conditional request so an unchanged image is never downloaded
+        get_kwargs["IfNoneMatch"] = if_none_match
+    try:
+        s3 = get_s3_client()
+        try:
+            image_object = await run_blocking(s3.get_object, **get_kwargs)
+        except s3.exceptions.NoSuchKey:
+            # Serve a placeholder image if the original is not found
+            get_kwargs["Key"] = PLACEHOLDER_IMAGE_KEY
+            image_object = await run_blocking(s3.get_object, **get_kwargs)
 
-        # Convert CMYK images to RGB to ensure compatibility with PNG or JPEG
-        if img.mode == "CMYK":
-            img = img.convert("RGB")
+    except ClientError as e:
+        if e.response.get("Error", {}).get("Code") in ("304", "NotModified"):
+            return Response(status_code=304, headers={
+                "ETag": if_none_match,
+                "Cache-Control": f"public, max-age={IMAGE_CACHE_MAX_AGE}",
+            })
+        raise HTTPException(status_code=500, detail=f"Error fetching image from S3: {str(e)}")
 
-        # Prepare buffer for image data
-        buffered = BytesIO()
-        img.save(buffered, format=img_format if img_format in ["PNG", "JPEG"] else "PNG")
-        img_base64 = base64.b64encode(buffered.getvalue()).decode("utf-8")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching image from S3: {str(e)}")
 
-        return {"image_base64": img_base64, "format": img_format}
+    headers = image_cache_headers(image_object)
+    if image_object.get("ContentLength") is not None:
+        headers["Content-Length"] = str(image_object["ContentLength"])
+    return StreamingResponse(
+        stream_s3_body(image_object["Body"]),
+        media_type=image_media_type(get_kwargs["Key"], image_object),
+        headers=headers,
+    )
 
+# Helper function to load a thumbnail from S3, generating and storing it on first request;
+# returns None when the original image doesn't exist
+def load_or_create_thumbnail(s3, image_key, width, fmt):
+    key = thumbnail_key(image_key, width, fmt)
+    try:
+        return s3.get_object(Bucket=S3_BUCKET_NAME, Key=key)["Body"].read()
     except s3.exceptions.NoSuchKey:
-        # Load a placeholder image if the original is not found
-        placeholder_key = "Research-Foundation/image-not-available.png"
-        image_object = s3.get_object(Bucket=S3_BUCKET_NAME, Key=placeholder_key)
-        image_data = image_object['Body'].read()
+        pass
 
-        # Open and process the placeholder image
-        img = Image.open(BytesIO(image_data))
-        if img.mode == "CMYK":
-            img = img.convert("RGB")
+    try:
+        image_data = s3.get_object(Bucket=S3_BUCKET_NAME, Key=image_key)["Body"].read()
+    except s3.exceptions.NoSuchKey:
+        return None
 
-        img_format = img.format
-        buffered = BytesIO()
-        img.save(buffered, format=img_format if img_format in ["PNG", "JPEG"] else "PNG")
-        img_base64 = base64.b64encode(buffered.getvalue()).decode("utf-8")
+    thumbnail = make_thumbnail(image_data, width, fmt)
+    s3.put_object(
+        Bucket=S3_BUCKET_NAME,
+        Key=key,
+        Body=thumbnail,
+        ContentType=THUMBNAIL_FORMATS[fmt][1],
+        CacheControl=f"public, max-age={IMAGE_CACHE_MAX_AGE}",
+    )
+    return thumbnail
 
-        return {"image_base64": img_base64, "format": img_format}
+# Helper function to resolve a thumbnail through the local disk cache, then S3
+def get_cached_thumbnail(image_key, width, fmt):
+    cache_key = thumbnail_key(image_key, width, fmt)
+    thumbnail = app.state.thumbnail_cache.get(cache_key)
+    if thumbnail is None:
+        thumbnail = load_or_create_thumbnail(get_s3_client(), image_key, width, fmt)
+        if thumbnail is None:
+            if image_key == PLACEHOLDER_IMAGE_KEY:
+                raise FileNotFoundError(f"Placeholder image {PLACEHOLDER_IMAGE_KEY} is missing")
+            # Serve the placeholder, cached under its own key so the image shows up once it's uploaded
+            return get_cached_thumbnail(PLACEHOLDER_IMAGE_KEY, width, fmt)
+        app.state.thumbnail_cache.put(cache_key, thumbnail)
+    return thumbnail
 
+# API to serve a downscaled gallery thumbnail, cached on local disk and in S3
+@app.get("/thumbnail/{image_key:path}")
+async def get_thumbnail(image_key: str, w: int = Query(320, gt=0), if_none_match: Optional[str] = Header(None)):
+    fmt = THUMBNAIL_FORMAT
+    try:
+        thumbnail = await run_blocking(get_cached_thumbnail, image_key, snap_width(w), fmt)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error fetching image from S3: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error creating thumbnail: {str(e)}")
+
+    headers = {
+        "ETag": thumbnail_etag(thumbnail),
+        "Cache-Control": f"public, max-age={IMAGE_CACHE_MAX_AGE}",
+    }
+    if if_none_match == headers["ETag"]:
+        return Response(status_code=304, headers=headers)
+    return Response(content=thumbnail, media_type=THUMBNAIL_FORMATS[fmt][1], headers=headers)
 
-# API to list all images in S3 bucket
+# API to report local thumbnail cache usage
+@app.get("/metrics/thumbnail-cache")
+async def thumbnail_cache_metrics():
+    return app.state.thumbnail_cache.stats()
+
+# API to list images in the S3 bucket one page at a time
 @app.get("/list-images")
-async def list_images():
-    s3 = get_s3_client()
+async def list_images(
+    limit: int = Query(LIST_IMAGES_DEFAULT_LIMIT, gt=0, le=LIST_IMAGES_MAX_LIMIT),
+    cursor: Optional[str] = None,
+    ext: Optional[List[str]] = Query(None),
+):
+    # Normalise extensions like "png" / ".PNG" to ".png"
+    extensions = tuple("." + e.lower().lstrip(".") for e in ext) if ext else IMAGE_EXTENSIONS
     try:
-        response = s3.list_objects_v2(Bucket=S3_BUCKET_NAME, Prefix="Research-Foundation/")
-        if 'Contents' not in response:
-            raise HTTPException(status_code=404, detail="No images found in S3 bucket")
+        return await run_blocking(app.state.image_key_index.page, limit, cursor, extensions)
 
-        image_files = [item['Key'] for item in response['Contents'] if item['Key'].endswith(('.png', '.jpg', '.jpeg'))]
-        return image_files
-    
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error listing images: {str(e)}")
 
-# Run the API server using: uvicorn api:app --reload
+# API to report the S3 key index size and last refresh time
+@app.get("/metrics/image-index")
+async def image_index_metrics():
+    return app.state.image_key_index.stats()
+
+# Run the API server from the repository root using: uvicorn fast_api.api:app --reload
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run("api:app", host="0.0.0.0", port=8000, reload=True)
+    uvicorn.run("fast_api.api:app", host="0.0.0.0", port=8000, reload=True)
@@ -0,0 +1,114 @@
+import threading
+import time
+
+
+class CatalogCache:
+    """In-process cache of `research_foundation` rows keyed by image_link and by pdf_key.
+
+    The table only changes when the Airflow upload task runs, so the whole catalog is
+    loaded at once, refreshed every `ttl` seconds and reloaded on demand after a DAG run.
+    A loaded catalog is authoritative: a link missing from it isn't in the table either.
+    """
+
+    def __init__(self, loader, ttl=3600.0):
+        # loader() returns an iterable of dicts with pdf_key, title, image_link, pdf_link, pdf_summary
+        self._loader = loader
+        self.ttl = ttl
+        self._by_image_link = {}
+        self._by_pdf_key = {}
+        self._loaded_at = None
+        self._lock = threading.RLock()
+        self._stop = threading.Event()
+        self._refresh_thread = None
+
+        self._hits = 0
+        self._misses = 0
+        self._loads = 0
+        self._load_errors = 0
+        self._last_load_seconds = None
+
+    def reload(self):
+        """Load the full catalog and atomically swap it in."""
+        start = time.monotonic()
+        try:
+            rows = list(self._loader())
+        except Exception:
+            with self._lock:
+                self._load_errors += 1
+            raise
+        by_image_link = {row["image_link"]: row for row in rows}
+        by_pdf_key = {row["pdf_key"]: row for row in rows}
+        with self._lock:
+            self._by_image_link = by_image_link
+            self._by_pdf_key = by_pdf_key
+            self._loaded_at = time.time()
+            self._loads += 1
+            self._last_load_seconds = time.monotonic() - start
+        return len(rows)
+
+    def invalidate(self):
+        """Drop all cached rows; the next lookup triggers a reload."""
+        with self._lock:
+            self._by_image_link = {}
+            self._by_pdf_key = {}
+            self._loaded_at = None
+
+    def _ensure_loaded(self):
+        if self._loaded_at is None:
+            with self._lock:
+                if self._loaded_at is None:
+                    self.reload()
+
+    def _lookup(self, index_name, key):
+        self._ensure_loaded()
+        with self._lock:
+            row = getattr(self, index_name).get(key)
+            if row is None:
+                self._misses += 1
+            else:
+                self._hits += 1
+            return row
+
+    def get_by_image_link(self, image_link):
+        """Return the row for `image_link`, or None if the catalog has no such image.
+
+        Loads the catalog on first use and raises if that load fails.
+        """
+        return self._lookup("_by_image_link", image_link)
+
+    def get_by_pdf_key(self, pdf_key):
+        """Return the row for `pdf_key`, or None if the catalog has no such document."""
+        return self._lookup("_by_pdf_key", pdf_key)
+
+    def start_auto_refresh(self):
+        """Refresh the catalog in a daemon thread every `ttl` seconds."""
+        if self._refresh_thread is not None:
+            return
+
+        def run():
+            while not self._stop.wait(self.ttl):
+                try:
+                    self.reload()
+                except Exception as e:
+                    print(f"Catalog cache refresh failed: {e}")
+
+        self._refresh_thread = threading.Thread(target=run, name="catalog-cache-refresh", daemon=True)
+        self._refresh_thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def stats(self):
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._by_image_link),
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / lookups if lookups else 0.0,
+                "loads": self._loads,
+                "load_errors": self._load_errors,
+                "last_load_seconds": self._last_load_seconds,
+                "loaded_at": self._loaded_at,
+                "ttl_seconds": self.ttl,
+            }
@@ -0,0 +1,191 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import snowflake.connector
+
+
+class PoolTimeoutError(Exception):
+    """Raised when no connection could be checked out within the pool timeout."""
+
+
+class SnowflakeConnectionPool:
+    """Bounded pool of long-lived Snowflake connections shared by all endpoints."""
+
+    def __init__(self, connect_kwargs, min_size=1, max_size=5, timeout=30.0, health_check_interval=300.0):
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError(f"Invalid pool size: min_size={min_size}, max_size={max_size}")
+
+        self._connect_kwargs = connect_kwargs
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+
+        self._idle = deque()  # (connection, time it was returned to the pool)
+        self._size = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+        # Checkout metrics
+        self._checkouts = 0
+        self._timeouts = 0
+        self._created = 0
+        self._recycled = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        self._recent_waits = deque(maxlen=1000)
+
+        # Pre-warm best effort: if Snowflake is unreachable the app still boots (S3-only routes keep
+        # working) and acquire() opens connections lazily once it is back
+        for _ in range(min_size):
+            try:
+                connection = self._connect()
+            except Exception as e:
+                print(f"Snowflake pool pre-warm failed, connecting lazily: {e}")
+                break
+            with self._cond:
+                self._idle.append((connection, time.monotonic()))
+                self._size += 1
+
+    def _connect(self):
+        connection = snowflake.connector.connect(**self._connect_kwargs)
+        with self._cond:
+            self._created += 1
+        return connection
+
+    def _is_healthy(self, connection, idle_since):
+        """Check a connection before handing it out; ping it if it sat idle for long."""
+        if connection.is_closed():
+            return False
+        if time.monotonic() - idle_since < self.health_check_interval:
+            return True
+        try:
+            cursor = connection.cursor()
+            try:
+                cursor.execute("SELECT 1")
+            finally:
+                cursor.close()
+            return True
+        except Exception:
+            return False
+
+    def _discard(self, connection):
+        with self._cond:
+            self._recycled += 1
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def acquire(self):
+        """Check out a connection, waiting up to `timeout` seconds for one to free up."""
+        start = time.monotonic()
+        deadline = start + self.timeout
+
+        while True:
+            connection = None
+            with self._cond:
+                while True:
+                    if self._closed:
+                        raise RuntimeError("Connection pool is closed")
+                    if self._idle:
+                        connection, idle_since = self._idle.pop()
+                        break
+                    if self._size < self.max_size:
+                        self._size += 1
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._timeouts += 1
+                        raise PoolTimeoutError(f"Timed out after {self.timeout}s waiting for a Snowflake connection")
+                    self._cond.wait(remaining)
+
+            if connection is None:
+                try:
+                    connection = self._connect()
+                except Exception:
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify()
+                    raise
+            elif not self._is_healthy(connection, idle_since):
+                # Stale connection: drop it and retry with the freed slot
+                self._discard(connection)
+                with self._cond:
+                    self._size -= 1
+                continue
+
+            self._record_wait(time.monotonic() - start)
+            return connection
+
+    def release(self, connection, broken=False):
+        """Return a connection to the pool, or close it if it is broken."""
+        with self._cond:
+            if broken or self._closed or connection.is_closed():
+                self._size -= 1
+                discard = True
+            else:
+                self._idle.append((connection, time.monotonic()))
+                discard = False
+            self._cond.notify()
+        if discard:
+            self._discard(connection)
+
+    @contextmanager
+    def connection(self):
+        """Context manager that checks out a connection and recycles it on Snowflake errors."""
+        conn = self.acquire()
+        try:
+            yield conn
+        except snowflake.connector.errors.Error:
+            self.release(conn, broken=True)
+            raise
+        except BaseException:
+            self.release(conn)
+            raise
+        else:
+            self.release(conn)
+
+    def _record_wait(self, wait):
+        with self._cond:
+            self._checkouts += 1
+            self._total_wait += wait
+            self._max_wait = max(self._max_wait, wait)
+            self._recent_waits.append(wait)
+
+    def stats(self):
+        """Return pool size and checkout wait-time metrics (in milliseconds)."""
+        with self._cond:
+            waits = sorted(self._recent_waits)
+            stats = {
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": self._size - len(self._idle),
+                "checkouts": self._checkouts,
+                "timeouts": self._timeouts,
+                "connections_created": self._created,
+                "connections_recycled": self._recycled,
+                "avg_wait_ms": (self._total_wait / self._checkouts * 1000) if self._checkouts else 0.0,
+                "max_wait_ms": self._max_wait * 1000,
+            }
+        for name, q in (("p50_wait_ms", 0.50), ("p95_wait_ms", 0.95), ("p99_wait_ms", 0.99)):
+            stats[name] = waits[min(len(waits) - 1, int(q * len(waits)))] * 1000 if waits else 0.0
+        return stats
+
+    def close(self):
+        """Close all idle connections; connections still checked out are closed on release."""
+        with self._cond:
+            self._closed = True
+            idle = [conn for conn, _ in self._idle]
+            self._idle.clear()
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for conn in idle:
+            try:
+                conn.close()
+            except Exception:
+                pass
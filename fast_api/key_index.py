@@ -0,0 +1,93 @@
+import bisect
+import threading
+import time
+
+
+class S3KeyIndex:
+    """Sorted, in-memory index of the object keys under an S3 prefix.
+
+    Listing follows `ContinuationToken` so buckets beyond 1000 objects are fully indexed,
+    and the index is refreshed in a background thread instead of on every page load.
+    """
+
+    def __init__(self, client_getter, bucket, prefix, ttl=300.0):
+        self._client_getter = client_getter
+        self.bucket = bucket
+        self.prefix = prefix
+        self.ttl = ttl
+        self._keys = []
+        self._refreshed_at = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._refresh_thread = None
+
+    def refresh(self):
+        """List every key under the prefix, following pagination, and swap the index in."""
+        paginator = self._client_getter().get_paginator("list_objects_v2")
+        keys = []
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self.prefix):
+            keys.extend(item["Key"] for item in page.get("Contents", []))
+        keys.sort()
+        with self._lock:
+            self._keys = keys
+            self._refreshed_at = time.time()
+        return len(keys)
+
+    def _ensure_loaded(self):
+        if self._refreshed_at is None:
+            self.refresh()
+
+    def page(self, limit, cursor=None, extensions=None):
+        """Return up to `limit` keys after `cursor` (the last key of the previous page).
+
+        `extensions` is an optional tuple such as ('.png', '.jpg'); matching is case-insensitive.
+        """
+        self._ensure_loaded()
+        with self._lock:
+            keys = self._keys
+        if extensions:
+            extensions = tuple(ext.lower() for ext in extensions)
+
+        def matches(key):
+            return not extensions or key.lower().endswith(extensions)
+
+        start = bisect.bisect_right(keys, cursor) if cursor else 0
+        items = []
+        position = start
+        while position < len(keys) and len(items) < limit:
+            if matches(keys[position]):
+                items.append(keys[position])
+            position += 1
+
+        # Only hand out a cursor if another matching key actually follows
+        next_cursor = None
+        if items and any(matches(key) for key in keys[position:]):
+            next_cursor = items[-1]
+
+        return {
+            "images": items,
+            "next_cursor": next_cursor,
+            "total": sum(1 for key in keys if matches(key)),
+        }
+
+    def start_auto_refresh(self):
+        """Re-list the prefix in a daemon thread every `ttl` seconds."""
+        if self._refresh_thread is not None:
+            return
+
+        def run():
+            while not self._stop.wait(self.ttl):
+                try:
+                    self.refresh()
+                except Exception as e:
+                    print(f"S3 key index refresh failed: {e}")
+
+        self._refresh_thread = threading.Thread(target=run, name="s3-key-index-refresh", daemon=True)
+        self._refresh_thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def stats(self):
+        with self._lock:
+            return {"keys": len(self._keys), "refreshed_at": self._refreshed_at, "ttl_seconds": self.ttl}
@@ -0,0 +1,57 @@
+import hashlib
+import posixpath
+from io import BytesIO
+
+from PIL import Image
+
+# Thumbnails are stored in S3 under this prefix, mirroring the original key
+THUMBNAIL_PREFIX = "thumbnails"
+
+# Requested widths are snapped up to one of these so each image has a handful of variants
+THUMBNAIL_WIDTHS = (160, 240, 320, 480, 640)
+
+THUMBNAIL_FORMATS = {
+    "WEBP": ("webp", "image/webp"),
+    "JPEG": ("jpg", "image/jpeg"),
+}
+
+
+def snap_width(width):
+    """Round a requested width up to the nearest supported thumbnail width."""
+    for supported in THUMBNAIL_WIDTHS:
+        if width <= supported:
+            return supported
+    return THUMBNAIL_WIDTHS[-1]
+
+
+def thumbnail_key(image_key, width, fmt):
+    """Derive the S3 key of a thumbnail variant, e.g. thumbnails/w320/Research-Foundation/x.webp."""
+    extension = THUMBNAIL_FORMATS[fmt][0]
+    stem = posixpath.splitext(image_key)[0]
+    return f"{THUMBNAIL_PREFIX}/w{width}/{stem}.{extension}"
+
+
+def thumbnail_etag(data):
+    return '"' + hashlib.md5(data).hexdigest() + '"'
+
+
+def make_thumbnail(image_data, width, fmt):
+    """Downscale an image to `width` pixels wide (never upscaling) and encode it as `fmt`."""
+    img = Image.open(BytesIO(image_data))
+    # Decode JPEGs directly at a reduced scale where possible; much cheaper than a full decode
+    img.draft("RGB", (width, width * 4))
+    if fmt == "JPEG" and img.mode != "RGB":
+        img = img.convert("RGB")
+    elif img.mode not in ("RGB", "RGBA"):
+        img = img.convert("RGBA" if "A" in img.getbands() or img.mode == "P" else "RGB")
+
+    if img.width > width:
+        height = max(1, round(img.height * width / img.width))
+        img = img.resize((width, height), Image.LANCZOS)
+
+    buffered = BytesIO()
+    if fmt == "WEBP":
+        img.save(buffered, format="WEBP", quality=80, method=4)
+    else:
+        img.save(buffered, format="JPEG", quality=80, optimize=True, progressive=True)
+    return buffered.getvalue()
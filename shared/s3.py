@@ -0,0 +1,55 @@
+import os
+import threading
+
+import boto3
+from botocore.config import Config
+
+# Process-wide S3 client shared by the FastAPI service, the Airflow DAG and the setup scripts.
+# boto3 clients are thread-safe, and reusing one keeps its HTTP keep-alive pool warm.
+_s3_client = None
+_s3_client_lock = threading.Lock()
+
+
+def s3_client_config():
+    """Build the botocore config (connection pool, retries, timeouts) from environment variables."""
+    return Config(
+        max_pool_connections=int(os.getenv("S3_MAX_POOL_CONNECTIONS", "50")),
+        retries={
+            "max_attempts": int(os.getenv("S3_MAX_ATTEMPTS", "5")),
+            "mode": os.getenv("S3_RETRY_MODE", "standard"),
+        },
+        connect_timeout=float(os.getenv("S3_CONNECT_TIMEOUT", "5")),
+        read_timeout=float(os.getenv("S3_READ_TIMEOUT", "30")),
+    )
+
+
+def create_s3_client():
+    """Create a new S3 client. Set S3_ENDPOINT_URL to point at a local stand-in such as MinIO."""
+    # Sessions are not thread-safe, so each client gets its own
+    session = boto3.session.Session(
+        aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID"),
+        aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
+        region_name=os.getenv("AWS_REGION") or "us-east-1",
+    )
+    return session.client(
+        "s3",
+        endpoint_url=os.getenv("S3_ENDPOINT_URL") or None,
+        config=s3_client_config(),
+    )
+
+
+def get_s3_client():
+    """Return the process-wide S3 client, creating it on first use."""
+    global _s3_client
+    if _s3_client is None:
+        with _s3_client_lock:
+            if _s3_client is None:
+                _s3_client = create_s3_client()
+    return _s3_client
+
+
+def reset_s3_client():
+    """Drop the shared client so the next call rebuilds it (e.g. inside a moto mock or after config changes)."""
+    global _s3_client
+    with _s3_client_lock:
+        _s3_client = None
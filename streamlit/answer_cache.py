@@ -0,0 +1,170 @@
+import os
+import re
+import threading
+import time
+
+import numpy as np
+
+# Answers are reused for any later question about the same document version whose embedding is at
+# least this cosine-similar to the cached one, which skips the LLM call entirely for paraphrases.
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.97"))
+SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "512"))
+SEMANTIC_CACHE_TTL = float(os.getenv("SEMANTIC_CACHE_TTL", "3600"))
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "true").lower() == "true"
+
+# Years, quarters, percentages and other figures; "revenue in 2022" and "revenue in 2023" embed
+# almost identically, so these must match exactly for a cached answer to be reused
+NUMERIC_TOKEN_PATTERN = re.compile(r"\b(?:q[1-4]|h[12])\b|(?:fy)?\d+(?:[.,]\d+)*%?")
+
+
+def numeric_tokens(query):
+    return frozenset(NUMERIC_TOKEN_PATTERN.findall(query.lower()))
+
+
+class SemanticAnswerCache:
+    """Fixed-size answer cache searched by query-embedding similarity.
+
+    Embeddings live in one preallocated float32 matrix, so a lookup is a single matrix-vector
+    product over the live slots belonging to the document version (pdf_key, content_hash).
+    Entries expire after `ttl` seconds; when full, the least recently used slot is overwritten.
+    """
+
+    def __init__(self, max_entries, threshold, ttl=SEMANTIC_CACHE_TTL):
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._vectors = None  # allocated on first insert, once the embedding dimension is known
+        self._pdf_keys = np.empty(max_entries, dtype=object)
+        self._content_hashes = np.empty(max_entries, dtype=object)
+        self._last_used = np.zeros(max_entries, dtype=np.float64)
+        self._expires = np.zeros(max_entries, dtype=np.float64)
+        self._in_use = np.zeros(max_entries, dtype=bool)
+        self._entries = [None] * max_entries
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    @staticmethod
+    def _normalize(embedding):
+        vector = np.asarray(embedding, dtype=np.float32)
+        return vector / max(float(np.linalg.norm(vector)), 1e-12)
+
+    def _nearest(self, vector, pdf_key, content_hash, numbers):
+        """Return (slot, similarity) of the closest live cached query for the document version
+        asking about the same figures, or (None, -1)."""
+        if self._vectors is None or self._vectors.shape[1] != vector.shape[0]:
+            return None, -1.0
+        live = self._in_use & (self._expires > time.time())
+        slots = np.flatnonzero(live & (self._pdf_keys == pdf_key) & (self._content_hashes == (content_hash or "")))
+        slots = np.array([slot for slot in slots if self._entries[slot][2] == numbers], dtype=np.int64)
+        if slots.size == 0:
+            return None, -1.0
+        similarities = self._vectors[slots] @ vector
+        best = int(np.argmax(similarities))
+        return int(slots[best]), float(similarities[best])
+
+    def lookup(self, embedding, query, pdf_key, content_hash=None):
+        """Return (answer, source_nodes, similarity) for a close enough cached query, else None."""
+        vector = self._normalize(embedding)
+        with self._lock:
+            slot, similarity = self._nearest(vector, pdf_key, content_hash, numeric_tokens(query))
+            if slot is None or similarity < self.threshold:
+                self._misses += 1
+                return None
+            self._last_used[slot] = time.time()
+            self._hits += 1
+            answer, source_nodes, _ = self._entries[slot]
+        return answer, list(source_nodes), similarity
+
+    def put(self, embedding, query, pdf_key, answer, source_nodes, content_hash=None):
+        vector = self._normalize(embedding)
+        numbers = numeric_tokens(query)
+        now = time.time()
+        with self._lock:
+            if self._vectors is None or self._vectors.shape[1] != vector.shape[0]:
+                self._vectors = np.zeros((self.max_entries, vector.shape[0]), dtype=np.float32)
+                self._in_use[:] = False
+            # A near-identical query replaces its entry instead of taking a second slot
+            slot, similarity = self._nearest(vector, pdf_key, content_hash, numbers)
+            if slot is None or similarity < 0.999:
+                free = np.flatnonzero(~self._in_use | (self._expires <= now))
+                if free.size:
+                    slot = int(free[0])
+                else:
+                    slot = int(np.argmin(self._last_used))
+                    self._evictions += 1
+            self._vectors[slot] = vector
+            self._pdf_keys[slot] = pdf_key
+            self._content_hashes[slot] = content_hash or ""
+            self._entries[slot] = (answer, list(source_nodes), numbers)
+            self._last_used[slot] = now
+            self._expires[slot] = now + self.ttl
+            self._in_use[slot] = True
+
+    def invalidate(self, pdf_key=None):
+        """Forget answers for one document, or all of them when pdf_key is None."""
+        with self._lock:
+            slots = np.flatnonzero(self._in_use) if pdf_key is None else np.flatnonzero(self._in_use & (self._pdf_keys == pdf_key))
+            self._in_use[slots] = False
+            self._last_used[slots] = 0.0
+            for slot in slots:
+                self._entries[slot] = None
+                self._pdf_keys[slot] = None
+                self._content_hashes[slot] = None
+
+    def stats(self):
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": int((self._in_use & (self._expires > time.time())).sum()),
+                "max_entries": self.max_entries,
+                "threshold": self.threshold,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / lookups if lookups else 0.0,
+                "evictions": self._evictions,
+            }
+
+
+class _DisabledAnswerCache:
+    """Stand-in used when SEMANTIC_CACHE_ENABLED is false; never stores anything."""
+
+    def lookup(self, embedding, query, pdf_key, content_hash=None):
+        return None
+
+    def put(self, embedding, query, pdf_key, answer, source_nodes, content_hash=None):
+        pass
+
+    def invalidate(self, pdf_key=None):
+        pass
+
+    def stats(self):
+        return {"enabled": False}
+
+
+_answer_cache = None
+_answer_cache_lock = threading.Lock()
+
+
+def get_answer_cache():
+    """Return the process-wide semantic answer cache."""
+    global _answer_cache
+    if _answer_cache is None:
+        with _answer_cache_lock:
+            if _answer_cache is None:
+                if SEMANTIC_CACHE_ENABLED:
+                    _answer_cache = SemanticAnswerCache(SEMANTIC_CACHE_MAX_ENTRIES, SEMANTIC_CACHE_THRESHOLD)
+                else:
+                    _answer_cache = _DisabledAnswerCache()
+    return _answer_cache
+
+
+def format_answer_cache_stats(stats):
+    """One-line summary for the terminal output pane."""
+    if "hits" not in stats:
+        return "Answer cache: disabled"
+    return (
+        f"Answer cache: {stats['hits']}/{stats['hits'] + stats['misses']} hits, "
+        f"{stats['entries']}/{stats['max_entries']} answers cached"
+    )
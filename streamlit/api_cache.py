@@ -0,0 +1,29 @@
+import os
+
+import streamlit as st
+
+import api_client
+from api_client import API_CACHE_TTL
+
+# Streamlit reruns whole page scripts on every interaction, so FastAPI responses are cached
+# across reruns and page switches. Entries expire after API_CACHE_TTL seconds and each
+# function keeps at most API_CACHE_MAX_ENTRIES results. Failed requests are never cached.
+# That bound counts entries, not bytes, so only small JSON responses are cached here;
+# thumbnails and full-size images are cached by api_client in byte-bounded LRUs.
+API_CACHE_MAX_ENTRIES = int(os.getenv("API_CACHE_MAX_ENTRIES", "512"))
+
+
+@st.cache_data(ttl=API_CACHE_TTL, max_entries=API_CACHE_MAX_ENTRIES, show_spinner=False)
+def list_images_page(cursor=None, limit=20):
+    return api_client.list_images_page(cursor, limit)
+
+
+@st.cache_data(ttl=API_CACHE_TTL, max_entries=API_CACHE_MAX_ENTRIES, show_spinner=False)
+def fetch_image_details(image_key):
+    return api_client.fetch_image_details(image_key)
+
+
+@st.cache_data(ttl=API_CACHE_TTL, max_entries=API_CACHE_MAX_ENTRIES, show_spinner=False)
+def fetch_image_details_batch(image_keys):
+    return api_client.fetch_image_details_batch(image_keys)
+
@@ -0,0 +1,142 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+API_BASE_URL = os.getenv("API_BASE_URL", "http://fastapi:8000")
+
+# Maximum number of FastAPI requests in flight at once across all Streamlit sessions
+GALLERY_FETCH_CONCURRENCY = int(os.getenv("GALLERY_FETCH_CONCURRENCY", "8"))
+
+# Lifetime of cached FastAPI responses (also used by the st.cache_data wrappers in api_cache)
+API_CACHE_TTL = int(os.getenv("API_CACHE_TTL", "600"))
+# Image bytes are cached here rather than with st.cache_data, in LRUs bounded by bytes:
+# thumbnails are fetched on the prefetch pool, outside any Streamlit script run, and
+# full-size images are too large for a cache that only bounds its number of entries
+THUMBNAIL_MEMORY_CACHE_BYTES = int(os.getenv("THUMBNAIL_MEMORY_CACHE_BYTES", str(64 * 1024 * 1024)))
+IMAGE_MEMORY_CACHE_BYTES = int(os.getenv("IMAGE_MEMORY_CACHE_BYTES", str(128 * 1024 * 1024)))
+
+# Module-level state survives Streamlit reruns, so the connection pool and workers are reused
+_session = None
+_executor = None
+_lock = threading.Lock()
+
+
+def get_session():
+    """Return the shared requests.Session, with a keep-alive pool sized for the prefetch workers."""
+    global _session
+    if _session is None:
+        with _lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=GALLERY_FETCH_CONCURRENCY)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                _session = session
+    return _session
+
+
+def get_executor():
+    """Return the shared thread pool that bounds concurrent FastAPI requests."""
+    global _executor
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=GALLERY_FETCH_CONCURRENCY, thread_name_prefix="api-prefetch")
+    return _executor
+
+
+class _BytesLRUCache:
+    """Thread-safe LRU of (bytes, content type) with per-entry expiry, bounded by total bytes.
+
+    Values larger than the whole budget are not cached.
+    """
+
+    def __init__(self, max_bytes, ttl):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.time():
+                self._bytes -= len(self._entries.pop(key)[1][0])
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, key, value):
+        if len(value[0]) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old[1][0])
+            self._entries[key] = (time.time() + self.ttl, value)
+            self._bytes += len(value[0])
+            while self._bytes > self.max_bytes:
+                self._bytes -= len(self._entries.popitem(last=False)[1][1][0])
+
+
+_thumbnail_cache = _BytesLRUCache(THUMBNAIL_MEMORY_CACHE_BYTES, API_CACHE_TTL)
+_image_cache = _BytesLRUCache(IMAGE_MEMORY_CACHE_BYTES, API_CACHE_TTL)
+
+
+def list_images_page(cursor=None, limit=20):
+    """Fetch one page of image keys: {"images": [...], "next_cursor": ..., "total": ...}."""
+    params = {"limit": limit}
+    if cursor:
+        params["cursor"] = cursor
+    response = get_session().get(f"{API_BASE_URL}/list-images", params=params)
+    response.raise_for_status()
+    return response.json()
+
+
+def fetch_thumbnail(image_key, width):
+    """Fetch a gallery thumbnail, from the in-process cache when possible; returns (bytes, content type).
+
+    Safe to call from the prefetch pool: it doesn't touch Streamlit.
+    """
+    cached = _thumbnail_cache.get((image_key, width))
+    if cached is not None:
+        return cached
+    response = get_session().get(f"{API_BASE_URL}/thumbnail/{image_key}", params={"w": width})
+    response.raise_for_status()
+    thumbnail = (response.content, response.headers.get("Content-Type", "image/png"))
+    _thumbnail_cache.put((image_key, width), thumbnail)
+    return thumbnail
+
+
+def fetch_image(image_key):
+    """Fetch the full-size image, from the in-process cache when possible; returns (bytes, content type)."""
+    cached = _image_cache.get(image_key)
+    if cached is not None:
+        return cached
+    response = get_session().get(f"{API_BASE_URL}/image/{image_key}")
+    response.raise_for_status()
+    image = (response.content, response.headers.get("Content-Type", "image/png"))
+    _image_cache.put(image_key, image)
+    return image
+
+
+def fetch_image_details(image_key):
+    """Fetch title, summary and pdf_key for one image."""
+    response = get_session().get(f"{API_BASE_URL}/image-details/{image_key}")
+    response.raise_for_status()
+    return response.json()
+
+
+def fetch_image_details_batch(image_keys):
+    """Fetch details for many images in one request; returns {key: details}."""
+    response = get_session().post(f"{API_BASE_URL}/image-details/batch", json={"keys": list(image_keys)})
+    response.raise_for_status()
+    return response.json()
@@ -0,0 +1,136 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+# Persistent cache of remote VLM/LLM descriptions, keyed by the hash of the input content,
+# the model name and the prompt. Re-processing an unchanged PDF then makes no remote calls.
+DESCRIPTION_CACHE_PATH = os.getenv(
+    "DESCRIPTION_CACHE_PATH", os.path.join(os.getcwd(), "vectorstore", "description_cache.sqlite3")
+)
+DESCRIPTION_CACHE_MAX_BYTES = int(os.getenv("DESCRIPTION_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+DESCRIPTION_CACHE_ENABLED = os.getenv("DESCRIPTION_CACHE_ENABLED", "true").lower() == "true"
+
+
+class DescriptionCache:
+    """SQLite-backed, size-bounded cache of description strings with LRU eviction."""
+
+    def __init__(self, path, max_bytes):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # One connection shared by the description threads; WAL lets other processes read concurrently
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS descriptions (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_descriptions_last_access ON descriptions (last_access)")
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(content, model, prompt):
+        """Content-addressed key: the same bytes, model and prompt always map to the same entry."""
+        if isinstance(content, str):
+            content = content.encode("utf-8")
+        content_hash = hashlib.sha256(content).hexdigest()
+        return hashlib.sha256(f"{model}\0{prompt}\0{content_hash}".encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM descriptions WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self._misses += 1
+                return None
+            self._conn.execute("UPDATE descriptions SET last_access = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+            self._hits += 1
+            return row[0]
+
+    def put(self, key, model, value):
+        size = len(value.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO descriptions (key, model, value, size, created_at, last_access) VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model, value, size, now, now)
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM descriptions").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self._conn.execute("SELECT key, size FROM descriptions ORDER BY last_access").fetchall():
+            if total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM descriptions WHERE key = ?", (key,))
+            total -= size
+            self._evictions += 1
+
+    def get_or_compute(self, content, model, prompt, compute):
+        """Return the cached description, or call `compute()` and cache its result."""
+        key = self.make_key(content, model, prompt)
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            if isinstance(value, str):
+                self.put(key, model, value)
+        return value
+
+    def stats(self):
+        with self._lock:
+            entries, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM descriptions").fetchone()
+            lookups = self._hits + self._misses
+            return {
+                "entries": entries,
+                "bytes": total,
+                "max_bytes": self.max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / lookups if lookups else 0.0,
+                "evictions": self._evictions,
+            }
+
+
+class _DisabledDescriptionCache:
+    """Stand-in used when DESCRIPTION_CACHE_ENABLED is false; always computes."""
+
+    def get_or_compute(self, content, model, prompt, compute):
+        return compute()
+
+    def stats(self):
+        return {"enabled": False}
+
+
+_description_cache = None
+_description_cache_lock = threading.Lock()
+
+
+def get_description_cache():
+    """Return the process-wide description cache."""
+    global _description_cache
+    if _description_cache is None:
+        with _description_cache_lock:
+            if _description_cache is None:
+                if DESCRIPTION_CACHE_ENABLED:
+                    _description_cache = DescriptionCache(DESCRIPTION_CACHE_PATH, DESCRIPTION_CACHE_MAX_BYTES)
+                else:
+                    _description_cache = _DisabledDescriptionCache()
+    return _description_cache
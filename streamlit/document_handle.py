@@ -0,0 +1,141 @@
+import hashlib
+import mmap
+import os
+import threading
+from collections import OrderedDict
+
+import fitz
+
+# Document handles (each with a read-only mmap for hashing) kept open across sessions and reruns
+DOCUMENT_HANDLE_CACHE_ENTRIES = int(os.getenv("DOCUMENT_HANDLE_CACHE_ENTRIES", "32"))
+# Budget for the viewer copies held by open handles; least recently used handles drop theirs first
+DOCUMENT_VIEWER_CACHE_BYTES = int(os.getenv("DOCUMENT_VIEWER_CACHE_BYTES", str(256 * 1024 * 1024)))
+
+
+class DocumentHandle:
+    """Process-wide handle for one PDF: a read-only mmap for hashing, plus the page count and
+    viewer bytes cached once and shared by every session.
+
+    The mapping backs `sha256` and the one-time viewer copy. PyMuPDF rejects mmap/memoryview streams and would copy a
+    `bytes` one, so the parser opens the file by path; it reads through the same OS page cache
+    as the mapping but is a separate reader, not a view of one shared buffer. `pdf_viewer` needs
+    `bytes`, so the viewer gets one copy per handle rather than zero.
+    """
+
+    def __init__(self, path):
+        # `name` mirrors the file object attribute get_pdf_documents derives document IDs from
+        self.name = path
+        self.path = os.path.abspath(path)
+        with open(self.path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            self.size = stat.st_size
+            self._version = (stat.st_size, stat.st_mtime_ns)
+            # mmap can't map an empty file; PyMuPDF rejects those anyway
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if self.size else None
+        self._lock = threading.Lock()
+        self._closed = False
+        self._sha256 = None
+        self._viewer_bytes = None
+        self._page_count = None
+
+    def is_current(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return False
+        return (stat.st_size, stat.st_mtime_ns) == self._version
+
+    def _mapping(self):
+        if self._closed:
+            raise ValueError(f"Document handle for {self.path} is closed")
+        return self._mmap if self._mmap is not None else b""
+
+    def sha256(self):
+        """Hex digest of the file, hashed straight from the mapping without reading it into memory."""
+        with self._lock:
+            if self._sha256 is None:
+                self._sha256 = hashlib.sha256(self._mapping()).hexdigest()
+            return self._sha256
+
+    def open_fitz(self):
+        """Open the document with PyMuPDF, by path.
+
+        PyMuPDF can't parse from the mapping, and a `stream=` of bytes would be a full copy;
+        by path, MuPDF reads pages on demand through the OS page cache.
+        """
+        return fitz.open(self.path)
+
+    def page_count(self):
+        with self._lock:
+            if self._page_count is None:
+                with self.open_fitz() as doc:
+                    self._page_count = len(doc)
+            return self._page_count
+
+    def viewer_bytes(self):
+        """The document as `bytes` for `pdf_viewer`, copied from the mapping once and then shared."""
+        with self._lock:
+            if self._viewer_bytes is None:
+                self._viewer_bytes = self._mapping()[:]
+            viewer_bytes = self._viewer_bytes
+        _enforce_viewer_budget()
+        return viewer_bytes
+
+    def release_viewer_bytes(self):
+        with self._lock:
+            released = len(self._viewer_bytes) if self._viewer_bytes is not None else 0
+            self._viewer_bytes = None
+            return released
+
+    def viewer_bytes_held(self):
+        viewer_bytes = self._viewer_bytes
+        return len(viewer_bytes) if viewer_bytes is not None else 0
+
+    def close(self):
+        # Callers may still hold the viewer bytes; those are independent of the mapping
+        with self._lock:
+            self._closed = True
+            self._viewer_bytes = None
+            if self._mmap is not None:
+                self._mmap.close()
+                self._mmap = None
+
+
+_handles = OrderedDict()
+_handles_lock = threading.Lock()
+
+
+def open_document(path):
+    """Return the process-wide handle for `path`, remapping it if the file changed on disk."""
+    key = os.path.abspath(path)
+    with _handles_lock:
+        handle = _handles.get(key)
+        if handle is not None and handle.is_current():
+            _handles.move_to_end(key)
+            return handle
+
+    handle = DocumentHandle(path)
+    with _handles_lock:
+        # Replaced and evicted handles aren't closed here: a session may still be using one, and
+        # the mapping is released when its last reference goes away
+        _handles[key] = handle
+        _handles.move_to_end(key)
+        # Deleted files (e.g. the ingestion DAG's temporary downloads) keep their disk space while mapped
+        for stale_key in [k for k, h in _handles.items() if k != key and not h.is_current()]:
+            del _handles[stale_key]
+        while len(_handles) > DOCUMENT_HANDLE_CACHE_ENTRIES:
+            _handles.popitem(last=False)
+    return handle
+
+
+def _enforce_viewer_budget():
+    """Drop viewer copies from the least recently used handles until the total fits the budget."""
+    with _handles_lock:
+        handles = list(_handles.values())
+    held = sum(handle.viewer_bytes_held() for handle in handles)
+    # Never drop the most recently used handle's copy; it is the one being shown
+    for handle in handles[:-1]:
+        if held <= DOCUMENT_VIEWER_CACHE_BYTES:
+            break
+        held -= handle.release_viewer_bytes()
+
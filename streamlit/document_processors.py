@@ -1,67 +1,108 @@
 import os
 import fitz
 import subprocess
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import get_context
 from llama_index.core import Document
+from description_cache import get_description_cache
+from document_handle import open_document
+from nvidia_client import NVIDIA_API_MAX_CONCURRENCY, get_nvidia_client
 from utils import (
-    is_graph, process_graph, extract_text_around_item, 
-    process_text_blocks
+    describe_figure, process_graph, extract_text_around_item, 
+    process_text_blocks, remote_calls_sent
 )
 
-def get_pdf_documents(pdf_file):
-    """Process a PDF file and extract 
-    text, tables, and images."""
-    all_pdf_documents = []
-    ongoing_tables = {}
+# Processes used for the PyMuPDF page extraction and threads used for the remote
+# description calls; set PDF_PARSE_WORKERS=1 to parse pages inline in this process.
+# The shared NVIDIA client caps and rate-limits the requests these threads make.
+PDF_PARSE_WORKERS = int(os.getenv("PDF_PARSE_WORKERS", str(min(4, os.cpu_count() or 1))))
+PDF_DESCRIBE_CONCURRENCY = int(os.getenv("PDF_DESCRIBE_CONCURRENCY", str(NVIDIA_API_MAX_CONCURRENCY)))
+
+def get_pdf_documents(pdf_file, parse_workers=None, describe_concurrency=None, doc_id=None):
+    """Process a PDF file (a file object or DocumentHandle) and extract 
+    text, tables, and images.
+
+    Pages are extracted in parallel worker processes and the VLM/LLM description
+    calls run in a bounded thread pool; documents come back in page order.
+    Document IDs start with `doc_id` (default: the file name without extension),
+    so they don't depend on where the file happens to be on disk."""
+    parse_workers = parse_workers or PDF_PARSE_WORKERS
+    describe_concurrency = describe_concurrency or PDF_DESCRIBE_CONCURRENCY
+    # Workers reopen the PDF by path
+    pdf_path = filename = pdf_file.name
+    doc_id = doc_id or os.path.splitext(os.path.basename(filename))[0]
 
     try:
-        f = fitz.open(pdf_file)
+        page_count = pdf_file.page_count() if hasattr(pdf_file, "page_count") else _count_pages(pdf_path)
     except Exception as e:
         print(f"Error opening or processing the PDF file: {e}")
         return []
 
-    for i in range(len(f)):
-        page = f[i]
-        text_blocks = [block for block in page.get_text("blocks", sort=True) 
-                       if block[-1] == 0 and not (block[1] < page.rect.height * 0.1 or block[3] > page.rect.height * 0.9)]
-        grouped_text_blocks = process_text_blocks(text_blocks)
-        
-        table_docs, table_bboxes, ongoing_tables = parse_all_tables(pdf_file.name, page, i, text_blocks, ongoing_tables)
-        all_pdf_documents.extend(table_docs)
-
-        image_docs = parse_all_images(pdf_file.name, page, i, text_blocks)
-        all_pdf_documents.extend(image_docs)
-
-        for text_block_ctr, (heading_block, content) in enumerate(grouped_text_blocks, 1):
-            heading_bbox = fitz.Rect(heading_block[:4])
-            if not any(heading_bbox.intersects(table_bbox) for table_bbox in table_bboxes):
-                bbox = {"x1": heading_block[0], "y1": heading_block[1], "x2": heading_block[2], "x3": heading_block[3]}
-                text_doc = Document(
-                    text=f"{heading_block[4]}\n{content}",
-                    metadata={
-                        **bbox,
-                        "type": "text",
-                        "page_num": i,
-                        "source": f"{pdf_file.name[:-4]}-page{i}-block{text_block_ctr}"
-                    },
-                    id_=f"{pdf_file.name[:-4]}-page{i}-block{text_block_ctr}"
-                )
-                all_pdf_documents.append(text_doc)
-
-    f.close()
+    pages = extract_pages(pdf_path, filename, page_count, parse_workers)
+    descriptions = describe_pages(pages, describe_concurrency)
+
+    all_pdf_documents = []
+    for page in pages:
+        all_pdf_documents.extend(build_page_documents(doc_id, page, descriptions))
     return all_pdf_documents
 
-def parse_all_tables(filename, page, pagenum, text_blocks, ongoing_tables):
+def _count_pages(pdf_path):
+    with fitz.open(pdf_path) as f:
+        return len(f)
+
+def extract_pages(pdf_path, filename, page_count, workers):
+    """Run the PyMuPDF extraction for every page, in page order."""
+    if workers <= 1 or page_count <= 1:
+        return extract_page_range(pdf_path, filename, range(page_count))
+
+    # Contiguous page ranges keep the number of times each worker opens the PDF low
+    chunk_size = max(1, -(-page_count // (workers * 4)))
+    page_ranges = [range(start, min(start + chunk_size, page_count)) for start in range(0, page_count, chunk_size)]
+    pages = []
+    # Spawn rather than fork: Streamlit and the HTTP clients run background threads
+    with ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn")) as executor:
+        for page_chunk in executor.map(extract_page_range, [pdf_path] * len(page_ranges), [filename] * len(page_ranges), page_ranges):
+            pages.extend(page_chunk)
+    return pages
+
+def extract_page_range(pdf_path, filename, page_numbers):
+    """Extract text blocks, tables and images from a range of pages (runs in a worker process)."""
+    pages = []
+    with fitz.open(pdf_path) as f:
+        for i in page_numbers:
+            pages.append(extract_page(filename, f[i], i))
+    return pages
+
+def extract_page(filename, page, pagenum):
+    """Extract everything needed to build a page's documents, without any remote calls."""
+    text_blocks = [block for block in page.get_text("blocks", sort=True) 
+                   if block[-1] == 0 and not (block[1] < page.rect.height * 0.1 or block[3] > page.rect.height * 0.9)]
+    grouped_text_blocks = process_text_blocks(text_blocks)
+
+    tables, table_bboxes = extract_tables(page, pagenum, text_blocks)
+    images = extract_images(page, pagenum, text_blocks)
+
+    # Text blocks that overlap a table are already covered by the table document;
+    # the block counter still advances over them so IDs match across runs
+    text_groups = []
+    for text_block_ctr, (heading_block, content) in enumerate(grouped_text_blocks, 1):
+        heading_bbox = fitz.Rect(heading_block[:4])
+        if not any(heading_bbox.intersects(table_bbox) for table_bbox in table_bboxes):
+            text_groups.append((text_block_ctr, tuple(heading_block), content))
+
+    return {"page_num": pagenum, "tables": tables, "images": images, "text_groups": text_groups}
+
+def extract_tables(page, pagenum, text_blocks):
     """Extract tables from a PDF page."""
-    table_docs = []
+    tables = []
     table_bboxes = []
     try:
-        tables = page.find_tables(horizontal_strategy="lines_strict", vertical_strategy="lines_strict")
-        for tab in tables:
+        for tab in page.find_tables(horizontal_strategy="lines_strict", vertical_strategy="lines_strict"):
             if not tab.header.external:
                 pandas_df = tab.to_pandas()
                 tablerefdir = os.path.join(os.getcwd(), "vectorstore/table_references")
                 os.makedirs(tablerefdir, exist_ok=True)
-                df_xlsx_path = os.path.join(tablerefdir, f"table{len(table_docs)+1}-page{pagenum}.xlsx")
+                df_xlsx_path = os.path.join(tablerefdir, f"table{len(tables)+1}-page{pagenum}.xlsx")
                 pandas_df.to_excel(df_xlsx_path)
                 bbox = fitz.Rect(tab.bbox)
                 table_bboxes.append(bbox)
@@ -69,35 +110,29 @@ def parse_all_tables(filename, page, pagenum, text_blocks, ongoing_tables):
                 before_text, after_text = extract_text_around_item(text_blocks, bbox, page.rect.height)
 
                 table_img = page.get_pixmap(clip=bbox)
-                table_img_path = os.path.join(tablerefdir, f"table{len(table_docs)+1}-page{pagenum}.jpg")
+                table_img_path = os.path.join(tablerefdir, f"table{len(tables)+1}-page{pagenum}.jpg")
                 table_img.save(table_img_path)
-                description = process_graph(table_img.tobytes())
-
-                caption = before_text.replace("\n", " ") + description + after_text.replace("\n", " ")
-                if before_text == "" and after_text == "":
-                    caption = " ".join(tab.header.names)
-                table_metadata = {
-                    "source": f"{filename[:-4]}-page{pagenum}-table{len(table_docs)+1}",
+                has_context = not (before_text == "" and after_text == "")
+                tables.append({
                     "dataframe": df_xlsx_path,
                     "image": table_img_path,
-                    "caption": caption,
-                    "type": "table",
-                    "page_num": pagenum
-                }
-                all_cols = ", ".join(list(pandas_df.columns.values))
-                doc = Document(text=f"This is a table with the caption: {caption}\nThe columns are {all_cols}", metadata=table_metadata)
-                table_docs.append(doc)
+                    # Without surrounding text the caption is just the header, so no description is needed
+                    "image_bytes": table_img.tobytes() if has_context else None,
+                    "before_text": before_text,
+                    "after_text": after_text,
+                    "header_names": list(tab.header.names),
+                    "columns": [str(col) for col in pandas_df.columns.values],
+                })
     except Exception as e:
         print(f"Error during table extraction: {e}")
-    return table_docs, table_bboxes, ongoing_tables
+    return tables, table_bboxes
 
-def parse_all_images(filename, page, pagenum, text_blocks):
+def extract_images(page, pagenum, text_blocks):
     """Extract images from a PDF page."""
-    image_docs = []
-    image_info_list = page.get_image_info(xrefs=True)
+    images = []
     page_rect = page.rect
 
-    for image_info in image_info_list:
+    for image_info in page.get_image_info(xrefs=True):
         xref = image_info['xref']
         if xref == 0:
             continue
@@ -118,21 +153,109 @@ def parse_all_images(filename, page, pagenum, text_blocks):
         if before_text == "" and after_text == "":
             continue
 
-        image_description = " "
-        if is_graph(image_data):
-            image_description = process_graph(image_data)
+        images.append({"xref": xref, "image": image_path, "before_text": before_text, "after_text": after_text})
+    return images
+
+# Remote calls per table description (DePlot + LLM explanation)
+TABLE_DESCRIPTION_CALLS = 2
 
-        caption = before_text.replace("\n", " ") + image_description + after_text.replace("\n", " ")
+def describe_table(image_bytes):
+    sent_before = remote_calls_sent()
+    description = process_graph(image_bytes)
+    return description, remote_calls_sent() - sent_before, TABLE_DESCRIPTION_CALLS
 
+def describe_image_file(image_path):
+    with open(image_path, "rb") as img_file:
+        image_data = img_file.read()
+    return describe_figure(image_data)
+
+def describe_pages(pages, concurrency):
+    """Run the remote description calls for all tables and images with bounded concurrency.
+
+    Returns {(page_num, "table"|"image", index): description or exception}."""
+    descriptions = {}
+    remote_calls = 0
+    baseline_calls = 0
+    with ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="pdf-describe") as executor:
+        futures = {}
+        for page in pages:
+            for n, table in enumerate(page["tables"]):
+                if table["image_bytes"] is not None:
+                    futures[(page["page_num"], "table", n)] = executor.submit(describe_table, table["image_bytes"])
+                else:
+                    baseline_calls += TABLE_DESCRIPTION_CALLS
+            for n, image in enumerate(page["images"]):
+                futures[(page["page_num"], "image", n)] = executor.submit(describe_image_file, image["image"])
+        for key, future in futures.items():
+            try:
+                descriptions[key], calls, baseline = future.result()
+                remote_calls += calls
+                baseline_calls += baseline
+            except Exception as e:
+                descriptions[key] = e
+    # Saved calls cover both skipped classifications and description cache hits
+    print(f"Remote description calls: {remote_calls} made, {baseline_calls - remote_calls} saved")
+    print(f"Description cache stats: {get_description_cache().stats()}")
+    print(f"NVIDIA API stats: {get_nvidia_client().stats()}")
+    return descriptions
+
+def build_page_documents(doc_id, page, descriptions):
+    """Assemble a page's table, image and text documents in the original order."""
+    pagenum = page["page_num"]
+    documents = []
+
+    for n, table in enumerate(page["tables"]):
+        source = f"{doc_id}-page{pagenum}-table{n+1}"
+        if table["image_bytes"] is None:
+            caption = " ".join(table["header_names"])
+        else:
+            description = descriptions[(pagenum, "table", n)]
+            if isinstance(description, Exception):
+                print(f"Error during table extraction: {description}")
+                continue
+            caption = table["before_text"].replace("\n", " ") + description + table["after_text"].replace("\n", " ")
+        table_metadata = {
+            "source": source,
+            "dataframe": table["dataframe"],
+            "image": table["image"],
+            "caption": caption,
+            "type": "table",
+            "page_num": pagenum
+        }
+        all_cols = ", ".join(table["columns"])
+        documents.append(Document(text=f"This is a table with the caption: {caption}\nThe columns are {all_cols}", metadata=table_metadata, id_=source))
+
+    for n, image in enumerate(page["images"]):
+        description = descriptions[(pagenum, "image", n)]
+        if isinstance(description, Exception):
+            raise description
+        # Numbered per page: the same xref can be placed on a page more than once
+        source = f"{doc_id}-page{pagenum}-image{n+1}"
+        caption = image["before_text"].replace("\n", " ") + description + image["after_text"].replace("\n", " ")
         image_metadata = {
-            "source": f"{filename[:-4]}-page{pagenum}-image{xref}",
-            "image": image_path,
+            "source": source,
+            "image": image["image"],
             "caption": caption,
             "type": "image",
             "page_num": pagenum
         }
-        image_docs.append(Document(text="This is an image with the caption: " + caption, metadata=image_metadata))
-    return image_docs
+        documents.append(Document(text="This is an image with the caption: " + caption, metadata=image_metadata, id_=source))
+
+    for text_block_ctr, heading_block, content in page["text_groups"]:
+        bbox = {"x1": heading_block[0], "y1": heading_block[1], "x2": heading_block[2], "x3": heading_block[3]}
+        text_doc = Document(
+            text=f"{heading_block[4]}\n{content}",
+            metadata={
+                **bbox,
+                "type": "text",
+                "page_num": pagenum,
+                "source": f"{doc_id}-page{pagenum}-block{text_block_ctr}"
+            },
+            id_=f"{doc_id}-page{pagenum}-block{text_block_ctr}"
+        )
+        documents.append(text_doc)
+
+    return documents
 
 def convert_ppt_to_pdf(ppt_path):
     """Convert a PowerPoint file to PDF using LibreOffice."""
@@ -164,9 +287,6 @@ def convert_pdf_to_images(pdf_path):
     return image_paths
 
 
-def load_multimodal_data(pdf_fp):
-    documents = []
-    with open(pdf_fp,"rb") as pdf_file:
-        pdf_documents = get_pdf_documents(pdf_file)
-        documents.extend(pdf_documents)
-    return documents
+def load_multimodal_data(pdf_fp, doc_id=None):
+    # The shared handle supplies the page count; PyMuPDF parses the pages from the file by path
+    return get_pdf_documents(open_document(pdf_fp), doc_id=doc_id)
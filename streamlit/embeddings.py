@@ -0,0 +1,176 @@
+import hashlib
+import os
+import re
+import threading
+import time
+from typing import Any, List
+
+import numpy as np
+from llama_index.core.base.embeddings.base import BaseEmbedding
+from llama_index.core.bridge.pydantic import Field, PrivateAttr
+
+# Which model embeds chunks and queries: "nvidia" (remote NIM endpoint), "local" (CPU
+# sentence-transformers model, no network) or "stub" (deterministic vectors for tests/benchmarks)
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "nvidia").lower()
+NVIDIA_EMBEDDING_MODEL = os.getenv("NVIDIA_EMBEDDING_MODEL", "nvidia/nv-embedqa-e5-v5")
+# bge-large is natively 1024-dim; other models are padded or projected to the collection dimension
+LOCAL_EMBEDDING_MODEL = os.getenv("LOCAL_EMBEDDING_MODEL", "BAAI/bge-large-en-v1.5")
+LOCAL_EMBEDDING_DEVICE = os.getenv("LOCAL_EMBEDDING_DEVICE", "cpu")
+LOCAL_EMBEDDING_BATCH_SIZE = int(os.getenv("LOCAL_EMBEDDING_BATCH_SIZE", "64"))
+LOCAL_EMBEDDING_QUERY_INSTRUCTION = os.getenv("LOCAL_EMBEDDING_QUERY_INSTRUCTION", "")
+
+EMBEDDING_BACKENDS = ("nvidia", "local", "stub")
+
+
+class StubEmbedding(BaseEmbedding):
+    """Deterministic, offline embedding model for benchmarking the ingestion path.
+
+    Each text maps to a unit vector seeded from its SHA-256, so identical texts always
+    embed identically. `latency` seconds are slept per batch to mimic a remote endpoint.
+    """
+
+    dim: int = Field(default=1024, description="Embedding dimension.")
+    latency: float = Field(default=0.0, description="Simulated seconds per embedding request.")
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "StubEmbedding"
+
+    def _vector(self, text: str) -> List[float]:
+        seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+        vector = np.random.default_rng(seed).standard_normal(self.dim).astype(np.float32)
+        vector /= np.linalg.norm(vector)
+        return vector.tolist()
+
+    def _get_query_embedding(self, query: str) -> List[float]:
+        if self.latency:
+            time.sleep(self.latency)
+        return self._vector(query)
+
+    async def _aget_query_embedding(self, query: str) -> List[float]:
+        return self._get_query_embedding(query)
+
+    def _get_text_embedding(self, text: str) -> List[float]:
+        return self._get_text_embeddings([text])[0]
+
+    def _get_text_embeddings(self, texts: List[str]) -> List[List[float]]:
+        if self.latency:
+            time.sleep(self.latency)
+        return [self._vector(text) for text in texts]
+
+
+def projection_matrix(source_dim, target_dim, seed=0):
+    """Map `source_dim` vectors into `target_dim`, or None when the dimensions already match.
+
+    Smaller models are zero-padded, which preserves cosine similarity exactly; larger ones use
+    a fixed Gaussian random projection, which preserves it approximately."""
+    if source_dim == target_dim:
+        return None
+    if source_dim < target_dim:
+        return np.eye(source_dim, target_dim, dtype=np.float32)
+    rng = np.random.default_rng(seed)
+    return (rng.standard_normal((source_dim, target_dim)) / np.sqrt(target_dim)).astype(np.float32)
+
+
+class LocalSentenceEmbedding(BaseEmbedding):
+    """CPU-local sentence-transformers model with batched, vectorized inference.
+
+    Output vectors are L2-normalised and padded/projected to `dim` so they fit the
+    collection schema used by the remote model."""
+
+    device: str = Field(default="cpu", description="Torch device the model runs on.")
+    dim: int = Field(default=1024, description="Output embedding dimension.")
+    query_instruction: str = Field(default="", description="Prefix added to queries before embedding.")
+
+    _model: Any = PrivateAttr()
+    _projection: Any = PrivateAttr()
+    _lock: Any = PrivateAttr()
+
+    def __init__(self, model_name=LOCAL_EMBEDDING_MODEL, device=LOCAL_EMBEDDING_DEVICE, dim=1024,
+                 embed_batch_size=LOCAL_EMBEDDING_BATCH_SIZE, query_instruction=LOCAL_EMBEDDING_QUERY_INSTRUCTION,
+                 **kwargs):
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError as e:
+            raise ImportError(
+                "EMBEDDING_BACKEND=local needs the sentence-transformers package: "
+                "`poetry install --extras local-embeddings`, or build the Airflow image with LOCAL_EMBEDDINGS=true"
+            ) from e
+        super().__init__(
+            model_name=model_name, device=device, dim=dim, embed_batch_size=embed_batch_size,
+            query_instruction=query_instruction, **kwargs
+        )
+        self._model = SentenceTransformer(model_name, device=device)
+        self._projection = projection_matrix(self._model.get_sentence_embedding_dimension(), dim)
+        # torch already spreads one batch over every core; concurrent batches would only oversubscribe them
+        self._lock = threading.Lock()
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "LocalSentenceEmbedding"
+
+    def _encode(self, texts: List[str]) -> List[List[float]]:
+        with self._lock:
+            vectors = self._model.encode(
+                texts, batch_size=self.embed_batch_size, convert_to_numpy=True,
+                normalize_embeddings=True, show_progress_bar=False
+            )
+        if self._projection is not None:
+            vectors = vectors @ self._projection
+            vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        return vectors.tolist()
+
+    def _get_query_embedding(self, query: str) -> List[float]:
+        return self._encode([self.query_instruction + query])[0]
+
+    async def _aget_query_embedding(self, query: str) -> List[float]:
+        return self._get_query_embedding(query)
+
+    def _get_text_embedding(self, text: str) -> List[float]:
+        return self._encode([text])[0]
+
+    def _get_text_embeddings(self, texts: List[str]) -> List[List[float]]:
+        return self._encode(texts)
+
+
+def create_embed_model(dim, embed_batch_size, backend=None):
+    """Build the embedding model selected by EMBEDDING_BACKEND."""
+    backend = (backend or EMBEDDING_BACKEND).lower()
+    if backend == "nvidia":
+        from llama_index.embeddings.nvidia import NVIDIAEmbedding
+        return NVIDIAEmbedding(model=NVIDIA_EMBEDDING_MODEL, truncate="END", embed_batch_size=min(embed_batch_size, 259))
+    if backend == "local":
+        return LocalSentenceEmbedding(dim=dim)
+    if backend == "stub":
+        return StubEmbedding(dim=dim, embed_batch_size=embed_batch_size)
+    raise ValueError(f"Unknown EMBEDDING_BACKEND {backend!r}; expected one of {', '.join(EMBEDDING_BACKENDS)}")
+
+
+_embed_models = {}
+_embed_models_lock = threading.Lock()
+
+
+def get_embed_model(dim, embed_batch_size, backend=None):
+    """Return the process-wide embedding model, built on first use.
+
+    Streamlit reruns call this on every interaction; the local backend loads its model
+    weights only once.
+    """
+    key = ((backend or EMBEDDING_BACKEND).lower(), dim, embed_batch_size)
+    model = _embed_models.get(key)
+    if model is None:
+        with _embed_models_lock:
+            model = _embed_models.get(key)
+            if model is None:
+                model = _embed_models[key] = create_embed_model(dim, embed_batch_size, backend)
+    return model
+
+
+def embedding_collection_name(base_name, backend=None):
+    """Collection for the configured backend; vectors from different models never share one."""
+    backend = (backend or EMBEDDING_BACKEND).lower()
+    if backend == "nvidia":
+        return base_name
+    if backend == "local":
+        return f"{base_name}_local_{re.sub(r'[^0-9A-Za-z]+', '_', LOCAL_EMBEDDING_MODEL).strip('_')}"
+    return f"{base_name}_{backend}"
@@ -0,0 +1,332 @@
+import os
+import threading
+
+from llama_index.core import Settings, VectorStoreIndex
+from llama_index.core.ingestion import run_transformations
+from llama_index.core.node_parser import SentenceSplitter
+from llama_index.core.vector_stores import ExactMatchFilter, MetadataFilters
+from llama_index.core.vector_stores.utils import metadata_dict_to_node
+from llama_index.llms.nvidia import NVIDIA
+from llama_index.vector_stores.milvus import MilvusVectorStore
+from pymilvus import DataType, MilvusClient
+
+from document_handle import open_document
+from document_processors import load_multimodal_data
+from embeddings import embedding_collection_name, get_embed_model
+from ingestion import EMBED_BATCH_SIZE, ingest_nodes
+from local_vector_store import LOCAL_VECTOR_STORE_PATH, LocalVectorStore
+from answer_cache import get_answer_cache
+from retrieval_cache import get_retrieval_cache
+from sparse_index import BM25Index, delete_sparse_index, load_sparse_index, save_sparse_index
+
+# Each embedding backend gets its own collection, e.g. Assignment3 for NVIDIA, Assignment3_local_... for local
+COLLECTION_NAME = os.getenv("MILVUS_COLLECTION_NAME", embedding_collection_name("Assignment3"))
+EMBEDDING_DIM = 1024
+
+# "milvus" (Zilliz Cloud) or "local" (on-disk store under LOCAL_VECTOR_STORE_PATH, no network needed)
+VECTOR_STORE_BACKEND = os.getenv("VECTOR_STORE_BACKEND", "milvus").lower()
+# BM25 indexes are rebuilt from the stored chunks, so each store and collection keeps its own
+SPARSE_INDEX_NAMESPACE = f"{VECTOR_STORE_BACKEND}_{COLLECTION_NAME}"
+
+# Milvus caps the rows a single query returns
+MILVUS_QUERY_LIMIT = 16384
+
+# Chunk metadata declared as typed, indexed scalar fields instead of dynamic JSON fields.
+# pdf_key is the partition key, so a pdf_key filter only searches that document's partition.
+MILVUS_SCALAR_FIELDS = [
+    ("pdf_key", DataType.VARCHAR, {"max_length": 512, "is_partition_key": True}),
+    ("content_hash", DataType.VARCHAR, {"max_length": 64}),
+    ("page_num", DataType.INT64, {}),
+    ("type", DataType.VARCHAR, {"max_length": 16}),
+]
+MILVUS_NUM_PARTITIONS = int(os.getenv("MILVUS_NUM_PARTITIONS", "64"))
+
+# One row per completely ingested document, written after its last chunk. A document only counts
+# as indexed once its manifest exists, so an ingestion that died part-way is redone, never served.
+MANIFEST_COLLECTION_NAME = f"{COLLECTION_NAME}_manifest"
+MANIFEST_FIELDS = ["pdf_key", "content_hash", "chunk_count"]
+MILVUS_SCALAR_INDEX_TYPE = os.getenv("MILVUS_SCALAR_INDEX_TYPE", "INVERTED")
+
+# Metadata added to every chunk so a document's vectors can be found and filtered later.
+# They are kept out of the embedded/LLM text so they don't change retrieval.
+INDEX_METADATA_KEYS = ["pdf_key", "content_hash"]
+
+_vector_store = None
+_vector_store_lock = threading.Lock()
+
+
+def initialize_settings():
+    """Configure the embedding model, LLM and chunking shared by indexing and querying."""
+    Settings.embed_model = get_embed_model(EMBEDDING_DIM, EMBED_BATCH_SIZE)
+    Settings.llm = NVIDIA(model="meta/llama-3.1-8b-instruct")
+    Settings.text_splitter = SentenceSplitter(chunk_size=600)
+
+
+def ensure_milvus_collection(client):
+    """Create the collection with the pdf_key partition key and indexed scalar fields if it doesn't exist.
+
+    MilvusVectorStore would otherwise create it with every metadata key as an unindexed dynamic
+    field, making each filtered search scan the whole corpus. The manifest collection is created too.
+    """
+    _ensure_manifest_collection(client)
+    if client.has_collection(COLLECTION_NAME):
+        fields = {field["name"] for field in client.describe_collection(COLLECTION_NAME)["fields"]}
+        missing = [name for name, _, _ in MILVUS_SCALAR_FIELDS if name not in fields]
+        if missing:
+            print(
+                f"Collection {COLLECTION_NAME} predates the scalar schema (missing {', '.join(missing)}); "
+                "filters fall back to dynamic fields. Re-create it to partition by pdf_key."
+            )
+        return
+
+    schema = MilvusClient.create_schema(auto_id=False, enable_dynamic_field=True)
+    schema.add_field("id", DataType.VARCHAR, is_primary=True, max_length=65535)
+    schema.add_field("embedding", DataType.FLOAT_VECTOR, dim=EMBEDDING_DIM)
+    for name, data_type, params in MILVUS_SCALAR_FIELDS:
+        schema.add_field(name, data_type, **params)
+
+    index_params = client.prepare_index_params()
+    index_params.add_index(field_name="embedding", index_type="AUTOINDEX", metric_type="IP")
+    for name, _, _ in MILVUS_SCALAR_FIELDS:
+        index_params.add_index(field_name=name, index_type=MILVUS_SCALAR_INDEX_TYPE)
+    client.create_collection(
+        COLLECTION_NAME, schema=schema, index_params=index_params,
+        num_partitions=MILVUS_NUM_PARTITIONS, consistency_level="Strong"
+    )
+
+
+def _ensure_manifest_collection(client):
+    if client.has_collection(MANIFEST_COLLECTION_NAME):
+        return
+    schema = MilvusClient.create_schema(auto_id=False, enable_dynamic_field=False)
+    schema.add_field("pdf_key", DataType.VARCHAR, is_primary=True, max_length=512)
+    schema.add_field("content_hash", DataType.VARCHAR, max_length=64)
+    schema.add_field("chunk_count", DataType.INT64)
+    # Milvus requires a vector field; manifests are only ever looked up by pdf_key
+    schema.add_field("placeholder", DataType.FLOAT_VECTOR, dim=2)
+    index_params = client.prepare_index_params()
+    index_params.add_index(field_name="placeholder", index_type="AUTOINDEX", metric_type="L2")
+    client.create_collection(
+        MANIFEST_COLLECTION_NAME, schema=schema, index_params=index_params, consistency_level="Strong"
+    )
+
+
+def _create_vector_store():
+    if VECTOR_STORE_BACKEND == "local":
+        return LocalVectorStore(path=os.path.join(LOCAL_VECTOR_STORE_PATH, COLLECTION_NAME))
+    connection = {
+        "uri": os.getenv("ZILLIZ_CLOUD_URI"),
+        "user": os.getenv("ZILLIZ_CLOUD_USER"),
+        "password": os.getenv("ZILLIZ_CLOUD_PASSWORD"),
+    }
+    client = MilvusClient(**connection)
+    try:
+        ensure_milvus_collection(client)
+    finally:
+        client.close()
+    return MilvusVectorStore(**connection, collection_name=COLLECTION_NAME, dim=EMBEDDING_DIM)
+
+
+def get_vector_store():
+    """Return the shared vector store selected by VECTOR_STORE_BACKEND, connecting on first use."""
+    global _vector_store
+    if _vector_store is None:
+        with _vector_store_lock:
+            if _vector_store is None:
+                _vector_store = _create_vector_store()
+    return _vector_store
+
+
+def file_content_hash(file_path):
+    """SHA-256 of a file's contents, hashed from its shared memory-mapped handle."""
+    return open_document(file_path).sha256()
+
+
+def _quote(value):
+    return '"' + str(value).replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def get_document_manifest(vector_store, pdf_key):
+    """Return {"pdf_key", "content_hash", "chunk_count"} for a completely ingested document, else None."""
+    if isinstance(vector_store, LocalVectorStore):
+        return vector_store.get_manifest(pdf_key)
+    rows = vector_store.client.query(
+        collection_name=MANIFEST_COLLECTION_NAME,
+        filter=f"pdf_key == {_quote(pdf_key)}",
+        output_fields=MANIFEST_FIELDS,
+        limit=1
+    )
+    return {field: rows[0][field] for field in MANIFEST_FIELDS} if rows else None
+
+
+def list_document_manifests(vector_store):
+    """{pdf_key: manifest} for every completely ingested document."""
+    if isinstance(vector_store, LocalVectorStore):
+        return vector_store.list_manifests()
+    rows = vector_store.client.query(
+        collection_name=MANIFEST_COLLECTION_NAME,
+        filter='pdf_key != ""',
+        output_fields=MANIFEST_FIELDS,
+        limit=MILVUS_QUERY_LIMIT
+    )
+    return {row["pdf_key"]: {field: row[field] for field in MANIFEST_FIELDS} for row in rows}
+
+
+def write_document_manifest(vector_store, pdf_key, content_hash, chunk_count):
+    """Record that every chunk of this version of the document is stored; call after the last batch."""
+    manifest = {"pdf_key": pdf_key, "content_hash": content_hash, "chunk_count": chunk_count}
+    if isinstance(vector_store, LocalVectorStore):
+        vector_store.set_manifest(pdf_key, manifest)
+        return
+    vector_store.client.upsert(collection_name=MANIFEST_COLLECTION_NAME, data=[{**manifest, "placeholder": [0.0, 0.0]}])
+
+
+def _delete_document_manifest(vector_store, pdf_key):
+    if isinstance(vector_store, LocalVectorStore):
+        vector_store.delete_manifest(pdf_key)
+        return
+    vector_store.client.delete(collection_name=MANIFEST_COLLECTION_NAME, filter=f"pdf_key == {_quote(pdf_key)}")
+
+
+def is_document_indexed(vector_store, pdf_key, content_hash=None):
+    """Check whether the document (optionally this exact version of it) was ingested to completion.
+
+    Chunks without a manifest are left over from a failed run and don't count.
+    """
+    manifest = get_document_manifest(vector_store, pdf_key)
+    return manifest is not None and (content_hash is None or manifest["content_hash"] == content_hash)
+
+
+def delete_document_vectors(vector_store, pdf_key):
+    """Remove every vector stored for a document (e.g. an older version of the PDF)."""
+    # Manifest first, so a delete that stops half-way never leaves a document marked complete
+    _delete_document_manifest(vector_store, pdf_key)
+    delete_sparse_index(SPARSE_INDEX_NAMESPACE, pdf_key)
+    if isinstance(vector_store, LocalVectorStore):
+        vector_store.delete_document(pdf_key)
+        return
+    vector_store.client.delete(
+        collection_name=COLLECTION_NAME,
+        filter=f"pdf_key == {_quote(pdf_key)}"
+    )
+
+
+def load_document_nodes(vector_store, pdf_key):
+    """Read back every stored chunk of a document."""
+    if isinstance(vector_store, LocalVectorStore):
+        return vector_store.get_document_nodes(pdf_key)
+    rows = vector_store.client.query(
+        collection_name=COLLECTION_NAME,
+        filter=f"pdf_key == {_quote(pdf_key)}",
+        output_fields=["_node_content", "_node_type"],
+        limit=MILVUS_QUERY_LIMIT
+    )
+    return [metadata_dict_to_node(row) for row in rows]
+
+
+def build_sparse_indexes(nodes):
+    """Build and persist a BM25 index per document from freshly chunked nodes."""
+    by_document = {}
+    for node in nodes:
+        if "pdf_key" in node.metadata:
+            by_document.setdefault(node.metadata["pdf_key"], []).append(node)
+    for pdf_key, document_nodes in by_document.items():
+        index = BM25Index.build(document_nodes, document_nodes[0].metadata.get("content_hash"))
+        save_sparse_index(SPARSE_INDEX_NAMESPACE, pdf_key, index)
+
+
+def get_document_sparse_index(pdf_key, content_hash=None):
+    """Return the BM25 index of this version of the document, rebuilding it from the stored chunks
+    when missing or stale. Without a content hash, the version in the manifest is used.
+
+    Indexes are written where the document was ingested (e.g. the Airflow worker), so another
+    host rebuilds its own copy from the vector store on first use. Returns None when the stored
+    chunks belong to a different version.
+    """
+    vector_store = get_vector_store()
+    if content_hash is None:
+        manifest = get_document_manifest(vector_store, pdf_key)
+        if manifest is None:
+            return None
+        content_hash = manifest["content_hash"]
+
+    index = load_sparse_index(SPARSE_INDEX_NAMESPACE, pdf_key, content_hash)
+    if index is None or index.content_hash != content_hash:
+        nodes = [
+            node for node in load_document_nodes(vector_store, pdf_key)
+            if node.metadata.get("content_hash") == content_hash
+        ]
+        if not nodes:
+            return None
+        index = BM25Index.build(nodes, content_hash)
+        save_sparse_index(SPARSE_INDEX_NAMESPACE, pdf_key, index)
+    return index
+
+
+def tag_documents(documents, pdf_key, content_hash):
+    """Attach the document key and content hash to every parsed Document.
+
+    page_num and type are also filled in when missing, since they are non-nullable scalar fields.
+    """
+    for doc in documents:
+        doc.metadata["pdf_key"] = pdf_key
+        doc.metadata["content_hash"] = content_hash
+        doc.metadata.setdefault("page_num", -1)
+        doc.metadata.setdefault("type", "text")
+        doc.excluded_embed_metadata_keys = list(set(doc.excluded_embed_metadata_keys + INDEX_METADATA_KEYS))
+        doc.excluded_llm_metadata_keys = list(set(doc.excluded_llm_metadata_keys + INDEX_METADATA_KEYS))
+    return documents
+
+
+def document_filters(pdf_key):
+    """Metadata filter that scopes retrieval to a single document."""
+    return MetadataFilters(filters=[ExactMatchFilter(key="pdf_key", value=pdf_key)])
+
+
+def create_index(documents, vector_store, progress_callback=None):
+    """Split documents into chunks, embed them in concurrent batches and bulk-write them to the store.
+
+    `progress_callback(stage, done, total, elapsed)` reports chunk throughput.
+    Returns (index, chunk_count).
+    """
+    nodes = run_transformations(documents, Settings.transformations)
+    stats = ingest_nodes(nodes, vector_store, Settings.embed_model, progress_callback=progress_callback)
+    build_sparse_indexes(nodes)
+    print(f"Ingested {stats['chunks']} chunks: embedding {stats['embed_seconds']:.1f}s, upsert {stats['upsert_seconds']:.1f}s")
+    return VectorStoreIndex.from_vector_store(vector_store), len(nodes)
+
+
+def index_document(pdf_key, pdf_path, content_hash=None, progress_callback=None):
+    """Parse and embed a document unless this version of it is already stored.
+
+    Returns (index, newly_indexed, chunk_count).
+    """
+    vector_store = get_vector_store()
+    if content_hash is None:
+        content_hash = file_content_hash(pdf_path)
+
+    manifest = get_document_manifest(vector_store, pdf_key)
+    if manifest is not None and manifest["content_hash"] == content_hash:
+        return VectorStoreIndex.from_vector_store(vector_store), False, manifest["chunk_count"]
+
+    # Drop vectors from any previous version or failed run so re-ingestion never duplicates chunks
+    delete_document_vectors(vector_store, pdf_key)
+    documents = tag_documents(load_multimodal_data(pdf_path, doc_id=pdf_key), pdf_key, content_hash)
+    index, chunk_count = create_index(documents, vector_store, progress_callback)
+    write_document_manifest(vector_store, pdf_key, content_hash, chunk_count)
+    # Results and answers cached for the previous version of the document are stale now
+    get_retrieval_cache().invalidate(pdf_key)
+    get_answer_cache().invalidate(pdf_key)
+    return index, True, chunk_count
+
+
+def open_document_index(pdf_key, content_hash=None):
+    """Open the index over a completely ingested document, or return None if it wasn't.
+
+    With `content_hash` the stored version must also be that exact version of the PDF, so the
+    answers match the document being shown.
+    """
+    vector_store = get_vector_store()
+    if not is_document_indexed(vector_store, pdf_key, content_hash):
+        return None
+    return VectorStoreIndex.from_vector_store(vector_store)
@@ -0,0 +1,95 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from llama_index.core.schema import MetadataMode
+from llama_index.core.vector_stores.utils import node_to_metadata_dict
+
+# Chunks sent per embedding request (the NVIDIA endpoint accepts at most 259)
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "50"))
+# Embedding requests in flight at once
+EMBED_CONCURRENCY = int(os.getenv("EMBED_CONCURRENCY", "4"))
+# Rows written to the vector store per upsert call
+UPSERT_BATCH_SIZE = int(os.getenv("UPSERT_BATCH_SIZE", "500"))
+
+
+def _batches(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def embed_nodes_batched(nodes, embed_model, batch_size=None, concurrency=None, progress_callback=None):
+    """Embed nodes in fixed-size batches with several requests in flight.
+
+    Nodes that already carry an embedding are skipped. `progress_callback(stage, done, total, elapsed)`
+    is called from the calling thread after every finished batch.
+    """
+    batch_size = max(1, batch_size or EMBED_BATCH_SIZE)
+    concurrency = max(1, concurrency or EMBED_CONCURRENCY)
+    pending = [node for node in nodes if node.embedding is None]
+    total = len(pending)
+    start = time.perf_counter()
+    done = 0
+
+    def embed_batch(batch):
+        texts = [node.get_content(metadata_mode=MetadataMode.EMBED) for node in batch]
+        return batch, embed_model.get_text_embedding_batch(texts)
+
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="embed") as executor:
+        futures = [executor.submit(embed_batch, batch) for batch in _batches(pending, batch_size)]
+        for future in as_completed(futures):
+            batch, embeddings = future.result()
+            for node, embedding in zip(batch, embeddings):
+                node.embedding = embedding
+            done += len(batch)
+            if progress_callback is not None:
+                progress_callback("embedding", done, total, time.perf_counter() - start)
+    return nodes
+
+
+def _milvus_entries(vector_store, nodes):
+    # Same row layout MilvusVectorStore.add writes, so the stored nodes read back identically
+    entries = []
+    for node in nodes:
+        entry = node_to_metadata_dict(node)
+        entry["id"] = node.node_id
+        entry[vector_store.embedding_field] = node.embedding
+        entries.append(entry)
+    return entries
+
+
+def upsert_nodes(vector_store, nodes, batch_size=None, progress_callback=None):
+    """Write embedded nodes to the vector store in large batches.
+
+    Milvus stores get a bulk `upsert` per batch (idempotent on node id); any other
+    LlamaIndex vector store falls back to its own `add`.
+    """
+    batch_size = max(1, batch_size or UPSERT_BATCH_SIZE)
+    client = getattr(vector_store, "client", None)
+    bulk_upsert = callable(getattr(client, "upsert", None)) and hasattr(vector_store, "embedding_field")
+    total = len(nodes)
+    start = time.perf_counter()
+    done = 0
+    for batch in _batches(nodes, batch_size):
+        if bulk_upsert:
+            client.upsert(collection_name=vector_store.collection_name, data=_milvus_entries(vector_store, batch))
+        else:
+            vector_store.add(batch)
+        done += len(batch)
+        if progress_callback is not None:
+            progress_callback("upserting", done, total, time.perf_counter() - start)
+    return done
+
+
+def ingest_nodes(nodes, vector_store, embed_model, batch_size=None, concurrency=None,
+                 upsert_batch_size=None, progress_callback=None):
+    """Embed and store chunked nodes; returns {"chunks", "embed_seconds", "upsert_seconds"}."""
+    start = time.perf_counter()
+    embed_nodes_batched(nodes, embed_model, batch_size, concurrency, progress_callback)
+    embedded = time.perf_counter()
+    upsert_nodes(vector_store, nodes, upsert_batch_size, progress_callback)
+    return {
+        "chunks": len(nodes),
+        "embed_seconds": embedded - start,
+        "upsert_seconds": time.perf_counter() - embedded,
+    }
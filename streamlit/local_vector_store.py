@@ -0,0 +1,426 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import uuid
+from typing import Any, List
+
+import numpy as np
+from llama_index.core.bridge.pydantic import Field, PrivateAttr
+from llama_index.core.schema import BaseNode
+from llama_index.core.vector_stores.types import (
+    BasePydanticVectorStore,
+    FilterCondition,
+    FilterOperator,
+    MetadataFilters,
+    VectorStoreQuery,
+    VectorStoreQueryResult,
+)
+from llama_index.core.vector_stores.utils import metadata_dict_to_node, node_to_metadata_dict
+
+# On-disk vector store used instead of Zilliz/Milvus when VECTOR_STORE_BACKEND=local
+LOCAL_VECTOR_STORE_PATH = os.getenv("LOCAL_VECTOR_STORE_PATH", os.path.join(os.getcwd(), "vectorstore", "local"))
+# Documents with at least this many chunks are searched through an IVF index instead of brute force
+LOCAL_VECTOR_IVF_MIN_ROWS = int(os.getenv("LOCAL_VECTOR_IVF_MIN_ROWS", "20000"))
+# IVF lists scanned per query; higher is slower but closer to exact
+LOCAL_VECTOR_IVF_NPROBE = int(os.getenv("LOCAL_VECTOR_IVF_NPROBE", "16"))
+
+# Partition for nodes that carry no pdf_key
+DEFAULT_PARTITION = "_default"
+
+META_FILE = "meta.json"
+VECTORS_FILE = "vectors.f32"
+ROWS_FILE = "rows.jsonl"
+IVF_FILE = "ivf.npz"
+# Written once a document's last chunk is stored; a partition without it is an incomplete ingestion
+MANIFEST_FILE = "manifest.json"
+
+
+def _normalize_rows(vectors):
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def _filter_matches(operator, value, metadata_value):
+    if metadata_value is None:
+        return False
+    if operator == FilterOperator.EQ:
+        return metadata_value == value
+    if operator == FilterOperator.NE:
+        return metadata_value != value
+    if operator == FilterOperator.GT:
+        return metadata_value > value
+    if operator == FilterOperator.GTE:
+        return metadata_value >= value
+    if operator == FilterOperator.LT:
+        return metadata_value < value
+    if operator == FilterOperator.LTE:
+        return metadata_value <= value
+    if operator == FilterOperator.IN:
+        return metadata_value in value
+    if operator == FilterOperator.NIN:
+        return metadata_value not in value
+    if operator == FilterOperator.CONTAINS:
+        return value in metadata_value
+    raise ValueError(f"Unsupported filter operator for the local vector store: {operator}")
+
+
+def metadata_matches(metadata, filters):
+    """Evaluate (possibly nested) MetadataFilters against one row's metadata."""
+    if filters is None or not filters.filters:
+        return True
+    results = (
+        metadata_matches(metadata, f) if isinstance(f, MetadataFilters)
+        else _filter_matches(f.operator, f.value, metadata.get(f.key))
+        for f in filters.filters
+    )
+    return any(results) if filters.condition == FilterCondition.OR else all(results)
+
+
+def _pinned_partition(filters):
+    """The pdf_key an AND-combined `pdf_key == x` filter pins the query to, if any."""
+    if filters is None or filters.condition == FilterCondition.OR:
+        return None
+    for f in filters.filters:
+        if not isinstance(f, MetadataFilters) and f.key == "pdf_key" and f.operator == FilterOperator.EQ:
+            return f.value
+    return None
+
+
+def build_ivf(vectors, n_lists, iterations=10, sample_size=None, seed=0):
+    """Spherical k-means over unit vectors; returns (centroids, row order grouped by list, list offsets)."""
+    rng = np.random.default_rng(seed)
+    count = vectors.shape[0]
+    sample_size = min(count, sample_size or 256 * n_lists)
+    sample = np.asarray(vectors[np.sort(rng.choice(count, sample_size, replace=False))], dtype=np.float32)
+    centroids = sample[rng.choice(sample_size, n_lists, replace=False)].copy()
+    for _ in range(iterations):
+        assignment = np.argmax(sample @ centroids.T, axis=1)
+        for list_id in range(n_lists):
+            members = sample[assignment == list_id]
+            if len(members):
+                centroids[list_id] = members.sum(axis=0)
+        centroids = _normalize_rows(centroids)
+
+    # Assign every row in blocks so the full matrix never has to be in memory at once
+    assignment = np.empty(count, dtype=np.int32)
+    for start in range(0, count, 65536):
+        block = np.asarray(vectors[start:start + 65536], dtype=np.float32)
+        assignment[start:start + 65536] = np.argmax(block @ centroids.T, axis=1)
+    order = np.argsort(assignment, kind="stable").astype(np.int64)
+    offsets = np.searchsorted(assignment[order], np.arange(n_lists + 1)).astype(np.int64)
+    return centroids.astype(np.float32), order, offsets
+
+
+def top_k(scores, k):
+    """Indices of the k largest scores, best first."""
+    if k >= len(scores):
+        return np.argsort(-scores)
+    candidates = np.argpartition(-scores, k)[:k]
+    return candidates[np.argsort(-scores[candidates])]
+
+
+class _Partition:
+    """One document's rows: a memory-mapped float32 matrix, node metadata and an optional IVF index."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        meta_path = os.path.join(directory, META_FILE)
+        self.mtime = os.path.getmtime(meta_path)
+        with open(meta_path) as f:
+            meta = json.load(f)
+        self.pdf_key = meta["pdf_key"]
+        self.dim = meta["dim"]
+        self.count = meta["count"]
+        self.rows_bytes = meta["rows_bytes"]
+        # Both files may hold a partial append past what meta.json publishes after a crash; it is ignored
+        if self.count:
+            self.vectors = np.memmap(
+                os.path.join(directory, VECTORS_FILE), dtype=np.float32, mode="r", shape=(self.count, self.dim)
+            )
+        else:
+            self.vectors = np.zeros((0, self.dim), dtype=np.float32)
+        with open(os.path.join(directory, ROWS_FILE), "rb") as f:
+            self.rows = [json.loads(line) for line in f.read(self.rows_bytes).splitlines()]
+        self._ivf = None
+        self._ivf_lock = threading.Lock()
+
+    def ivf(self, min_rows):
+        """Load or (re)build the IVF index once the partition is large enough; None means brute force."""
+        if self.count < min_rows:
+            return None
+        with self._ivf_lock:
+            return self._load_or_build_ivf()
+
+    def _load_or_build_ivf(self):
+        if self._ivf is None:
+            path = os.path.join(self.directory, IVF_FILE)
+            if os.path.exists(path):
+                data = np.load(path)
+                if int(data["count"]) == self.count:
+                    self._ivf = (data["centroids"], data["order"], data["offsets"])
+            if self._ivf is None:
+                self._ivf = build_ivf(self.vectors, n_lists=max(1, int(np.sqrt(self.count))))
+                tmp_path = f"{path}.{uuid.uuid4().hex}.tmp.npz"
+                np.savez(tmp_path, centroids=self._ivf[0], order=self._ivf[1], offsets=self._ivf[2], count=self.count)
+                os.replace(tmp_path, path)
+        return self._ivf
+
+    def search(self, query_vector, k, mask=None, ivf_min_rows=LOCAL_VECTOR_IVF_MIN_ROWS, nprobe=LOCAL_VECTOR_IVF_NPROBE):
+        """Return (row indices, scores) of the top-k rows by inner product, honouring a boolean row mask."""
+        if self.count == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        ivf = self.ivf(ivf_min_rows)
+        if ivf is None:
+            candidates = np.flatnonzero(mask) if mask is not None else None
+            scores = (self.vectors if candidates is None else self.vectors[candidates]) @ query_vector
+        else:
+            centroids, order, offsets = ivf
+            lists = top_k(centroids @ query_vector, min(nprobe, len(centroids)))
+            candidates = np.sort(np.concatenate([order[offsets[i]:offsets[i + 1]] for i in lists]))
+            if mask is not None:
+                candidates = candidates[mask[candidates]]
+            scores = self.vectors[candidates] @ query_vector
+        best = top_k(scores, k)
+        rows = best if candidates is None else candidates[best]
+        return rows, scores[best]
+
+
+class LocalVectorStore(BasePydanticVectorStore):
+    """Disk-backed LlamaIndex vector store with one partition per document (pdf_key).
+
+    Each partition keeps its unit-normalised embeddings in a memory-mapped float32 file, so
+    the OS page cache rather than the Python heap holds them. Small documents are searched
+    exactly; documents past `ivf_min_rows` chunks get an inverted-file index built lazily.
+    """
+
+    stores_text: bool = True
+    path: str = Field(default=LOCAL_VECTOR_STORE_PATH)
+    ivf_min_rows: int = Field(default=LOCAL_VECTOR_IVF_MIN_ROWS)
+    nprobe: int = Field(default=LOCAL_VECTOR_IVF_NPROBE)
+
+    _partitions: Any = PrivateAttr()
+    _lock: Any = PrivateAttr()
+
+    def __init__(self, path=LOCAL_VECTOR_STORE_PATH, ivf_min_rows=LOCAL_VECTOR_IVF_MIN_ROWS,
+                 nprobe=LOCAL_VECTOR_IVF_NPROBE, **kwargs):
+        super().__init__(path=path, ivf_min_rows=ivf_min_rows, nprobe=nprobe, **kwargs)
+        os.makedirs(path, exist_ok=True)
+        self._partitions = {}
+        self._lock = threading.RLock()
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "LocalVectorStore"
+
+    @property
+    def client(self) -> Any:
+        return None
+
+    def _partition_dir(self, pdf_key):
+        return os.path.join(self.path, hashlib.sha1(pdf_key.encode("utf-8")).hexdigest()[:20])
+
+    def _partition(self, directory):
+        """Open a partition, reloading it if another writer changed it since it was cached."""
+        meta_path = os.path.join(directory, META_FILE)
+        if not os.path.exists(meta_path):
+            self._partitions.pop(directory, None)
+            return None
+        partition = self._partitions.get(directory)
+        if partition is None or partition.mtime != os.path.getmtime(meta_path):
+            partition = _Partition(directory)
+            self._partitions[directory] = partition
+        return partition
+
+    def _all_partitions(self):
+        return [
+            partition for name in sorted(os.listdir(self.path))
+            if (partition := self._partition(os.path.join(self.path, name))) is not None
+        ]
+
+    @staticmethod
+    def _write_meta(directory, pdf_key, dim, count, rows_bytes):
+        tmp_path = os.path.join(directory, f"{META_FILE}.{uuid.uuid4().hex}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump({"pdf_key": pdf_key, "dim": dim, "count": count, "rows_bytes": rows_bytes}, f)
+        os.replace(tmp_path, os.path.join(directory, META_FILE))
+
+    @staticmethod
+    def _encode_rows(rows):
+        return b"".join(json.dumps(row).encode("utf-8") + b"\n" for row in rows)
+
+    def _append(self, pdf_key, nodes):
+        directory = self._partition_dir(pdf_key)
+        os.makedirs(directory, exist_ok=True)
+        partition = self._partition(directory)
+        count = partition.count if partition else 0
+        rows_bytes = partition.rows_bytes if partition else 0
+
+        vectors = _normalize_rows(np.asarray([node.get_embedding() for node in nodes], dtype=np.float32))
+        if partition is not None and vectors.shape[1] != partition.dim:
+            raise ValueError(f"Embedding dimension {vectors.shape[1]} does not match stored dimension {partition.dim}")
+
+        # Append rows first and publish them by bumping the count in meta.json last
+        with open(os.path.join(directory, VECTORS_FILE), "r+b" if count else "wb") as f:
+            f.seek(count * vectors.shape[1] * 4)
+            f.write(vectors.tobytes())
+            f.truncate()
+        encoded = self._encode_rows(
+            {
+                "id": node.node_id,
+                "ref_doc_id": node.ref_doc_id,
+                "metadata": node_to_metadata_dict(node, remove_text=False, flat_metadata=False),
+            }
+            for node in nodes
+        )
+        with open(os.path.join(directory, ROWS_FILE), "r+b" if count else "wb") as f:
+            f.seek(rows_bytes)
+            f.write(encoded)
+            f.truncate()
+        self._write_meta(directory, pdf_key, vectors.shape[1], count + len(nodes), rows_bytes + len(encoded))
+
+    def add(self, nodes: List[BaseNode], **add_kwargs: Any) -> List[str]:
+        groups = {}
+        for node in nodes:
+            groups.setdefault(node.metadata.get("pdf_key", DEFAULT_PARTITION), []).append(node)
+        with self._lock:
+            for pdf_key, group in groups.items():
+                self._append(pdf_key, group)
+        return [node.node_id for node in nodes]
+
+    def _rewrite(self, partition, keep):
+        """Replace a partition with the rows selected by the boolean mask `keep`.
+
+        The manifest isn't carried over: a document missing some of its rows is no longer complete.
+        """
+        directory = partition.directory
+        if not keep.any():
+            self.delete_document(partition.pdf_key)
+            return
+        tmp_dir = f"{directory}.{uuid.uuid4().hex}.tmp"
+        os.makedirs(tmp_dir)
+        np.asarray(partition.vectors[keep], dtype=np.float32).tofile(os.path.join(tmp_dir, VECTORS_FILE))
+        encoded = self._encode_rows(row for row, kept in zip(partition.rows, keep) if kept)
+        with open(os.path.join(tmp_dir, ROWS_FILE), "wb") as f:
+            f.write(encoded)
+        self._write_meta(tmp_dir, partition.pdf_key, partition.dim, int(keep.sum()), len(encoded))
+        trash_dir = f"{directory}.{uuid.uuid4().hex}.old"
+        os.replace(directory, trash_dir)
+        os.replace(tmp_dir, directory)
+        shutil.rmtree(trash_dir, ignore_errors=True)
+        self._partitions.pop(directory, None)
+
+    def delete(self, ref_doc_id: str, **delete_kwargs: Any) -> None:
+        with self._lock:
+            for partition in self._all_partitions():
+                keep = np.array([row["ref_doc_id"] != ref_doc_id for row in partition.rows], dtype=bool)
+                if not keep.all():
+                    self._rewrite(partition, keep)
+
+    def delete_document(self, pdf_key):
+        """Drop a document's whole partition."""
+        with self._lock:
+            directory = self._partition_dir(pdf_key)
+            self._partitions.pop(directory, None)
+            shutil.rmtree(directory, ignore_errors=True)
+
+    def set_manifest(self, pdf_key, manifest):
+        """Mark a document as completely ingested; the marker goes away with its partition."""
+        with self._lock:
+            directory = self._partition_dir(pdf_key)
+            os.makedirs(directory, exist_ok=True)
+            tmp_path = os.path.join(directory, f"{MANIFEST_FILE}.{uuid.uuid4().hex}.tmp")
+            with open(tmp_path, "w") as f:
+                json.dump(manifest, f)
+            os.replace(tmp_path, os.path.join(directory, MANIFEST_FILE))
+
+    def get_manifest(self, pdf_key):
+        try:
+            with open(os.path.join(self._partition_dir(pdf_key), MANIFEST_FILE)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def delete_manifest(self, pdf_key):
+        try:
+            os.remove(os.path.join(self._partition_dir(pdf_key), MANIFEST_FILE))
+        except FileNotFoundError:
+            pass
+
+    def list_manifests(self):
+        """{pdf_key: manifest} for every completely ingested document."""
+        manifests = {}
+        for name in sorted(os.listdir(self.path)):
+            try:
+                with open(os.path.join(self.path, name, MANIFEST_FILE)) as f:
+                    manifest = json.load(f)
+            except (FileNotFoundError, NotADirectoryError):
+                continue
+            manifests[manifest["pdf_key"]] = manifest
+        return manifests
+
+    def get_document_nodes(self, pdf_key):
+        """All stored nodes of a document, in insertion order."""
+        with self._lock:
+            partition = self._partition(self._partition_dir(pdf_key))
+        if partition is None:
+            return []
+        return [metadata_dict_to_node(row["metadata"]) for row in partition.rows]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._partitions.clear()
+            shutil.rmtree(self.path, ignore_errors=True)
+            os.makedirs(self.path, exist_ok=True)
+
+    def _row_mask(self, partition, query):
+        """Boolean mask for filters that the partition choice doesn't already cover, or None."""
+        checks = []
+        if query.filters is not None and query.filters.filters:
+            pinned = _pinned_partition(query.filters)
+            remaining = [
+                f for f in query.filters.filters
+                if pinned is None or isinstance(f, MetadataFilters) or not (f.key == "pdf_key" and f.operator == FilterOperator.EQ)
+            ]
+            if remaining:
+                filters = MetadataFilters(filters=remaining, condition=query.filters.condition)
+                checks.append(lambda row: metadata_matches(row["metadata"], filters))
+        if query.node_ids:
+            node_ids = set(query.node_ids)
+            checks.append(lambda row: row["id"] in node_ids)
+        if query.doc_ids:
+            doc_ids = set(query.doc_ids)
+            checks.append(lambda row: row["ref_doc_id"] in doc_ids)
+        if not checks:
+            return None
+        return np.array([all(check(row) for check in checks) for row in partition.rows], dtype=bool)
+
+    def query(self, query: VectorStoreQuery, **kwargs: Any) -> VectorStoreQueryResult:
+        if query.query_embedding is None:
+            raise ValueError("LocalVectorStore needs a query embedding")
+        query_vector = np.asarray(query.query_embedding, dtype=np.float32)
+        query_vector /= max(float(np.linalg.norm(query_vector)), 1e-12)
+
+        with self._lock:
+            pinned = _pinned_partition(query.filters)
+            if pinned is not None:
+                partition = self._partition(self._partition_dir(pinned))
+                partitions = [partition] if partition is not None else []
+            else:
+                partitions = self._all_partitions()
+
+        hits = []
+        for partition in partitions:
+            mask = self._row_mask(partition, query)
+            rows, scores = partition.search(query_vector, query.similarity_top_k, mask, self.ivf_min_rows, self.nprobe)
+            hits.extend((float(score), partition, int(row)) for row, score in zip(rows, scores))
+        hits.sort(key=lambda hit: hit[0], reverse=True)
+        hits = hits[:query.similarity_top_k]
+
+        nodes = [metadata_dict_to_node(partition.rows[row]["metadata"]) for _, partition, row in hits]
+        return VectorStoreQueryResult(
+            nodes=nodes,
+            similarities=[score for score, _, _ in hits],
+            ids=[partition.rows[row]["id"] for _, partition, row in hits],
+        )
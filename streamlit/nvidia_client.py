@@ -0,0 +1,214 @@
+import asyncio
+import os
+import random
+import threading
+import time
+
+import httpx
+
+# Base URL of the NVIDIA AI endpoints; point it at a local fake server for offline runs
+NVIDIA_API_BASE_URL = os.getenv("NVIDIA_API_BASE_URL", "https://ai.api.nvidia.com/v1")
+# OpenAI-style chat completions for the hosted LLMs, served from a different host than the VLMs
+NVIDIA_CHAT_COMPLETIONS_URL = os.getenv("NVIDIA_CHAT_COMPLETIONS_URL", "https://integrate.api.nvidia.com/v1/chat/completions")
+NVIDIA_API_TIMEOUT = float(os.getenv("NVIDIA_API_TIMEOUT", "60"))
+# Requests in flight at once across every Streamlit session and ingestion thread
+NVIDIA_API_MAX_CONCURRENCY = int(os.getenv("NVIDIA_API_MAX_CONCURRENCY", "8"))
+# Token bucket: sustained requests per second and burst size; set the rate to 0 to disable it
+NVIDIA_API_RATE_LIMIT = float(os.getenv("NVIDIA_API_RATE_LIMIT", "4"))
+NVIDIA_API_BURST = int(os.getenv("NVIDIA_API_BURST", "8"))
+# Retries for 429, 5xx and network errors, with exponential backoff (Retry-After wins when sent)
+NVIDIA_API_MAX_RETRIES = int(os.getenv("NVIDIA_API_MAX_RETRIES", "5"))
+NVIDIA_API_BACKOFF_BASE = float(os.getenv("NVIDIA_API_BACKOFF_BASE", "0.5"))
+NVIDIA_API_BACKOFF_MAX = float(os.getenv("NVIDIA_API_BACKOFF_MAX", "30"))
+
+RETRYABLE_STATUS_CODES = frozenset({408, 429, 500, 502, 503, 504})
+
+
+class NVIDIAAPIError(Exception):
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class TokenBucket:
+    """Async token bucket; waiters are served in arrival order."""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = max(1.0, float(capacity))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self):
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    def pause(self, seconds):
+        """Drain the bucket so no request goes out for `seconds`, e.g. after a 429."""
+        if self.rate <= 0:
+            return
+        self._refill()
+        self._tokens = min(self._tokens, -seconds * self.rate)
+
+
+class NVIDIAClient:
+    """Shared client for the NVIDIA AI endpoints.
+
+    Requests run on one background event loop over a pooled `httpx.AsyncClient`, so every
+    caller reuses the same keep-alive connections. A token bucket spaces requests out, a
+    semaphore caps how many are in flight, and throttled or failed requests are retried with
+    exponential backoff. Synchronous callers use `post`/`chat`; coroutines on any event loop
+    can await `apost`/`achat`.
+    """
+
+    def __init__(self, base_url=None, api_key=None, max_concurrency=None, rate_limit=None, burst=None,
+                 max_retries=None, timeout=None, transport=None):
+        self.base_url = (base_url or NVIDIA_API_BASE_URL).rstrip("/")
+        self._api_key = api_key
+        self.max_concurrency = max_concurrency or NVIDIA_API_MAX_CONCURRENCY
+        self._rate_limit = NVIDIA_API_RATE_LIMIT if rate_limit is None else rate_limit
+        self._burst = burst or NVIDIA_API_BURST
+        self.max_retries = NVIDIA_API_MAX_RETRIES if max_retries is None else max_retries
+        self._timeout = timeout or NVIDIA_API_TIMEOUT
+        self._transport = transport
+        self._http = None
+        self._semaphore = None
+        self._bucket = None
+        self._stats_lock = threading.Lock()
+        self._requests = 0
+        self._retries = 0
+        self._throttled = 0
+        self._failures = 0
+
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="nvidia-api", daemon=True)
+        self._thread.start()
+
+    def _setup(self):
+        # Created on the client's own loop, which the asyncio primitives and connection pool belong to
+        if self._http is None:
+            self._http = httpx.AsyncClient(
+                timeout=self._timeout,
+                limits=httpx.Limits(max_connections=self.max_concurrency, max_keepalive_connections=self.max_concurrency),
+                transport=self._transport,
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._bucket = TokenBucket(self._rate_limit, self._burst)
+
+    def _headers(self):
+        api_key = self._api_key or os.getenv("NVIDIA_API_KEY")
+        if not api_key:
+            raise ValueError("NVIDIA API Key is not set. Please set the NVIDIA_API_KEY environment variable.")
+        return {"Authorization": f"Bearer {api_key}", "Accept": "application/json"}
+
+    def _count(self, **increments):
+        with self._stats_lock:
+            for name, value in increments.items():
+                setattr(self, f"_{name}", getattr(self, f"_{name}") + value)
+
+    def _backoff(self, attempt, response=None):
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after:
+            try:
+                return min(float(retry_after), NVIDIA_API_BACKOFF_MAX)
+            except ValueError:
+                pass
+        # Full jitter keeps retrying sessions from hitting the endpoint in lockstep
+        return random.uniform(0, min(NVIDIA_API_BACKOFF_MAX, NVIDIA_API_BACKOFF_BASE * 2 ** attempt))
+
+    async def _post(self, path, payload):
+        self._setup()
+        url = path if path.startswith(("http://", "https://")) else f"{self.base_url}/{path.lstrip('/')}"
+        headers = self._headers()
+        for attempt in range(self.max_retries + 1):
+            await self._bucket.acquire()
+            response = None
+            async with self._semaphore:
+                self._count(requests=1)
+                try:
+                    response = await self._http.post(url, json=payload, headers=headers)
+                except httpx.TransportError as e:
+                    error = NVIDIAAPIError(f"Request to {url} failed: {e!r}")
+                else:
+                    if response.status_code < 400:
+                        return response.json()
+                    error = NVIDIAAPIError(
+                        f"Request to {url} failed: HTTP {response.status_code} {response.text[:200]}",
+                        status_code=response.status_code,
+                    )
+                    if response.status_code not in RETRYABLE_STATUS_CODES:
+                        self._count(failures=1)
+                        raise error
+            if attempt == self.max_retries:
+                break
+            delay = self._backoff(attempt, response)
+            if response is not None and response.status_code == 429:
+                # Everyone shares the quota, so every caller waits, not just this one
+                self._count(throttled=1)
+                self._bucket.pause(delay)
+            self._count(retries=1)
+            await asyncio.sleep(delay)
+        self._count(failures=1)
+        raise error
+
+    def _submit(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    async def apost(self, path, payload):
+        """POST `payload` as JSON to `path` under the base URL (or to an absolute URL) and return the decoded response."""
+        return await asyncio.wrap_future(self._submit(self._post(path, payload)))
+
+    def post(self, path, payload):
+        return self._submit(self._post(path, payload)).result()
+
+    async def achat(self, path, content, **params):
+        """Send a single user message and return the first choice's text."""
+        response = await self.apost(path, {"messages": [{"role": "user", "content": content}], "stream": False, **params})
+        return response["choices"][0]["message"]["content"]
+
+    def chat(self, path, content, **params):
+        response = self.post(path, {"messages": [{"role": "user", "content": content}], "stream": False, **params})
+        return response["choices"][0]["message"]["content"]
+
+    def stats(self):
+        with self._stats_lock:
+            return {
+                "requests": self._requests,
+                "retries": self._retries,
+                "throttled": self._throttled,
+                "failures": self._failures,
+            }
+
+    def close(self):
+        if self._http is not None:
+            self._submit(self._http.aclose()).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_nvidia_client():
+    """Return the process-wide NVIDIA API client."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = NVIDIAClient()
+    return _client
@@ -1,8 +1,10 @@
 import streamlit as st
 import requests
-import base64
 from io import BytesIO
 from PIL import Image
+from api_cache import fetch_image_details
+# Full-size images are cached by api_client in a byte-bounded LRU; st.cache_data only bounds entries
+from api_client import fetch_image
 
 # Set Streamlit configuration
 st.set_page_config(
@@ -10,8 +12,6 @@ st.set_page_config(
     initial_sidebar_state="collapsed"
 )
 
-API_BASE_URL = "http://fastapi:8000"
-
 # Redirect to landing if no image is selected
 if not st.session_state.get('selected_image'):
     st.switch_page("pages/user_landing.py")
@@ -19,10 +19,8 @@ if not st.session_state.get('selected_image'):
 # Function to get image from FastAPI
 def load_image_from_fastapi(image_key):
     try:
-        response = requests.get(f"{API_BASE_URL}/fetch-image/{image_key}")
-        response.raise_for_status()
-        image_base64 = response.json().get("image_base64")
-        img = Image.open(BytesIO(base64.b64decode(image_base64)))
+        image_bytes, _ = fetch_image(image_key)
+        img = Image.open(BytesIO(image_bytes))
         return img
     except requests.RequestException as e:
         st.error(f"Error fetching image: {str(e)}")
@@ -31,9 +29,7 @@ def load_image_from_fastapi(image_key):
 # Updated function to get image details from FastAPI
 def get_image_details_from_fastapi(image_key):
     try:
-        response = requests.get(f"{API_BASE_URL}/image-details/{image_key}")
-        response.raise_for_status()
-        return response.json()
+        return fetch_image_details(image_key)
     except requests.RequestException as e:
         st.error(f"Error fetching image details: {str(e)}")
         return {
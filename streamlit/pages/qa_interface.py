@@ -2,20 +2,17 @@ import base64
 from datetime import datetime
 import os
 from fpdf import FPDF
-import requests
 import streamlit as st
 from streamlit_pdf_viewer import pdf_viewer
 from pathlib import Path
-from llama_index.core import Settings
-from llama_index.core import VectorStoreIndex, StorageContext
-from llama_index.core.node_parser import SentenceSplitter
-from llama_index.vector_stores.milvus import MilvusVectorStore
-from llama_index.embeddings.nvidia import NVIDIAEmbedding
-from llama_index.llms.nvidia import NVIDIA
-from document_processors import load_multimodal_data
+from document_handle import open_document
+from indexing import file_content_hash, index_document, initialize_settings, open_document_index
+from retrieval import build_query_engine
+from retrieval_cache import format_cache_stats, get_retrieval_cache
+from answer_cache import format_answer_cache_stats, get_answer_cache
+from pdf_cache import PDFDownloadError, get_pdf_cache
 from utils import set_environment_variables
 from dotenv import load_dotenv
-from pymilvus import connections
  
 # Load environment variables from .env file
 load_dotenv()
@@ -26,33 +23,15 @@ st.set_page_config(
     initial_sidebar_state="collapsed"
 )
  
-# Initialize settings
-def initialize_settings():
-    Settings.embed_model = NVIDIAEmbedding(model="nvidia/nv-embedqa-e5-v5", truncate="END")
-    Settings.llm = NVIDIA(model="meta/llama-3.1-8b-instruct")
-    Settings.text_splitter = SentenceSplitter(chunk_size=600)
- 
-# Create index from documents
-def create_index(documents):
-    vector_store = MilvusVectorStore(
-        uri=os.getenv("ZILLIZ_CLOUD_URI"),
-        user=os.getenv("ZILLIZ_CLOUD_USER"),
-        password=os.getenv("ZILLIZ_CLOUD_PASSWORD"),
-        collection_name="Assignment3",
-        dim=1024
-    )
-    storage_context = StorageContext.from_defaults(vector_store=vector_store)
-    return VectorStoreIndex.from_documents(documents, storage_context=storage_context)
+# Documents are pre-indexed by the Airflow DAG; set to "true" to parse and embed missing ones on demand
+ALLOW_INTERACTIVE_INDEXING = os.getenv("ALLOW_INTERACTIVE_INDEXING", "false").lower() == "true"
  
 def download_pdf(url):
-    response = requests.get(url)
-    if response.status_code == 200:
-        temp_file_path = 'streamlit/pages/temp_document.pdf'
-        with open(temp_file_path, 'wb') as f:
-            f.write(response.content)
-        return temp_file_path
-    else:
-        st.error("Failed to download the PDF.")
+    # Streams into the shared content-addressed cache; a document fetched before opens from disk
+    try:
+        return get_pdf_cache().fetch(url)
+    except PDFDownloadError as e:
+        st.error(f"Failed to download the PDF: {e}")
         return None
  
 def show_pdf(file_path):
@@ -60,9 +39,8 @@ def show_pdf(file_path):
         if not Path(file_path).exists():
             st.error(f"File not found: {file_path}")
             return False
-        with open(file_path, 'rb') as pdf_file:
-            pdf_content = pdf_file.read()
-        pdf_viewer(pdf_content)
+        # One bytes copy per document, made from the shared mapping and reused by every session
+        pdf_viewer(open_document(file_path).viewer_bytes())
         return True
     except Exception as e:
         st.error(f"Error displaying PDF: {str(e)}")
@@ -173,11 +151,30 @@ def main():
             try:
                 pdf_path = download_pdf(pdf_link)
                 if pdf_path:
-                    documents = load_multimodal_data(pdf_path)
-                    st.session_state['index'] = create_index(documents)
-                    st.session_state['history'] = []
-                    st.session_state['pdf_key'] = pdf_key  # Set the pdf_key in session state
-                    st.success("Document fetched and index created!")
+                    # Open the vectors written by the ingestion DAG; Q&A only reads the store, and only
+                    # once the DAG finished this exact version of the PDF
+                    content_hash = file_content_hash(pdf_path)
+                    index = open_document_index(pdf_key, content_hash)
+                    if index is None and ALLOW_INTERACTIVE_INDEXING:
+                        progress_bar = st.progress(0.0, text="Indexing document...")
+
+                        def show_progress(stage, done, total, elapsed):
+                            rate = done / elapsed if elapsed else 0.0
+                            progress_bar.progress(
+                                done / total if total else 1.0,
+                                text=f"{stage.capitalize()}: {done}/{total} chunks ({rate:.1f} chunks/s)"
+                            )
+
+                        index, _, _ = index_document(pdf_key, pdf_path, content_hash, progress_callback=show_progress)
+                        progress_bar.empty()
+                    if index is None:
+                        st.warning("This version of the document hasn't been fully indexed yet. Please try again after the ingestion pipeline has run.")
+                    else:
+                        st.session_state['index'] = index
+                        st.session_state['history'] = []
+                        st.session_state['pdf_key'] = pdf_key  # Set the pdf_key in session state
+                        st.session_state['content_hash'] = content_hash
+                        st.success("Document fetched and index loaded!")
                     st.subheader("PDF Preview:")
                     show_pdf(pdf_path)
             except Exception as e:
@@ -193,7 +190,10 @@ def main():
             if 'notes' not in st.session_state:
                 st.session_state['notes'] = ""
            
-            query_engine = st.session_state['index'].as_query_engine(similarity_top_k=10, streaming=True)
+            # Only retrieve chunks belonging to the open document; repeated questions hit the retrieval cache
+            query_engine = build_query_engine(
+                st.session_state['index'], st.session_state['pdf_key'], st.session_state.get('content_hash')
+            )
  
             user_input = st.chat_input("Enter your query:")
  
@@ -225,6 +225,10 @@ def main():
                     message_placeholder.markdown(full_response)
                 st.session_state['history'].append({"role": "assistant", "content": full_response})
                 st.session_state['terminal_output'] += f"Assistant: {full_response}\n"
+                if response.metadata and "semantic_cache_similarity" in response.metadata:
+                    st.session_state['terminal_output'] += f"Answer served from cache (similarity {response.metadata['semantic_cache_similarity']:.3f})\n"
+                st.session_state['terminal_output'] += format_cache_stats(get_retrieval_cache().stats()) + "\n"
+                st.session_state['terminal_output'] += format_answer_cache_stats(get_answer_cache().stats()) + "\n"
  
            
             if st.button("Clear Chat"):
@@ -1,10 +1,11 @@
-import os
 import streamlit as st
 import requests
 import base64
-from io import BytesIO
-from PIL import Image
+from concurrent.futures import as_completed
 from dotenv import load_dotenv
+from api_client import fetch_thumbnail, get_executor
+from api_cache import fetch_image_details_batch, list_images_page
+from nvidia_client import NVIDIAAPIError, get_nvidia_client
 
 load_dotenv()
 
@@ -13,7 +14,11 @@ st.set_page_config(
     initial_sidebar_state="collapsed",
 )
 
-API_BASE_URL = "http://fastapi:8000" 
+# Width of the gallery thumbnails requested from FastAPI (5 columns on a wide layout)
+THUMBNAIL_WIDTH = 320
+
+# Number of publications shown per gallery page
+GALLERY_PAGE_SIZE = 20
 
 
 # Display welcome message
@@ -106,39 +111,22 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# Function to get image from FastAPI
-def load_image_from_fastapi(image_key):
-    try:
-        # print(f"Requesting image with key: {image_key}")  # Debugging log
-        response = requests.get(f"{API_BASE_URL}/fetch-image/{image_key}")
-        # print(f"Response status: {response.status_code}")  # Log the response status
-        # print(f"Response content: {response.text}")
-        response.raise_for_status()
-        image_base64 = response.json().get("image_base64")
-        img = Image.open(BytesIO(base64.b64decode(image_base64)))
-        return img
-    except requests.RequestException as e:
-        st.error(f"Error fetching image: {str(e)}")
-        return None
-
-
-# Function to get image details from FastAPI
-def get_image_details_from_fastapi(image_key):
+# Function to get details for every image in the grid from FastAPI in one request
+def get_image_details_batch_from_fastapi(image_keys):
     try:
-        print(f"Requesting details for image key: {image_key}")
-        response = requests.get(f"{API_BASE_URL}/image-details/{image_key}")
-        response.raise_for_status()
-        details = response.json()
-        return details.get("title"), details.get("pdf_summary")
+        return {
+            key: (details.get("title"), details.get("pdf_summary"))
+            for key, details in fetch_image_details_batch(tuple(image_keys)).items()
+        }
     except requests.RequestException as e:
         st.error(f"Error fetching image details: {str(e)}")
-        return "Untitled", "No description available."
+        return {}
 
 # Function to create the image with information
-def create_image_with_info(image_base64, title, description):
+def create_image_with_info(image_base64, title, description, content_type="image/png"):
     return f"""
     <div class="image-container">
-        <img src="data:image/png;base64,{image_base64}" class="image-main">
+        <img src="data:{content_type};base64,{image_base64}" class="image-main">
         <div class="info-card">
             <div class="info-title">{title}</div>
             <div class="info-description">{description}</div>
@@ -149,36 +137,14 @@ def create_image_with_info(image_base64, title, description):
 
 # Function to query NVIDIA API for summary
 def get_nvidia_summary(title, description):
-    NVIDIA_API_URL = "https://ai.api.nvidia.com/v1/vlm/nvidia/neva-22b"  # Replace with your actual endpoint
-    NVIDIA_API_KEY = os.getenv("NVIDIA_API_KEY")  # Replace with your actual API key
-
-    headers = {
-        "Authorization": f"Bearer {NVIDIA_API_KEY}",
-        "Content-Type": "application/json"
-    }
-    payload = {
-        "messages": [
-            {
-                "role": "user",
-                "content": f'Write a 5 line summary for the following title and summary: Title: {title}. Summary: {description}'
-            }
-        ],
-        "max_tokens": 1024,
-        "temperature": 0.20,
-        "top_p": 0.70,
-        "seed": 0,
-        "stream": False
-    }
     try:
-        response = requests.post(NVIDIA_API_URL, json=payload, headers=headers)
-        response.raise_for_status()
-        json_response = response.json()
-        
-        # Extract the summary from the response
-        summary_content = json_response['choices'][0]['message']['content']
-        return summary_content 
-        
-    except requests.RequestException as e:
+        # Shared client: pooled connections, rate limiting and retries on 429/5xx
+        return get_nvidia_client().chat(
+            "vlm/nvidia/neva-22b",
+            f'Write a 5 line summary for the following title and summary: Title: {title}. Summary: {description}',
+            max_tokens=1024, temperature=0.20, top_p=0.70, seed=0
+        )
+    except (NVIDIAAPIError, ValueError) as e:
         st.error(f"Error fetching summary from NVIDIA API: {str(e)}")
         return "Error retrieving summary."
 
@@ -199,47 +165,84 @@ def handle_click(image_file, title, description):
     st.write("NVIDIA Summary:", nvidia_summary)  # Display the summary on the current page
     st.switch_page("pages/doc_detail.py")
 
-# Function to create the image grid from FastAPI
+# Function to get one page of image keys from FastAPI
+def list_images_page_from_fastapi(cursor=None, limit=GALLERY_PAGE_SIZE):
+    return list_images_page(cursor, limit)
+
+# Function to render the previous/next controls below the grid
+def create_page_controls(page):
+    cursors = st.session_state.gallery_cursors
+    total_pages = max(1, -(-page["total"] // GALLERY_PAGE_SIZE))
+    prev_col, info_col, next_col = st.columns([1, 3, 1])
+    with prev_col:
+        if len(cursors) > 1 and st.button("← Previous", key="gallery_prev"):
+            cursors.pop()
+            st.rerun()
+    with info_col:
+        st.caption(f"Page {len(cursors)} of {total_pages}")
+    with next_col:
+        if page["next_cursor"] and st.button("Next →", key="gallery_next"):
+            cursors.append(page["next_cursor"])
+            st.rerun()
+
+# Function to render one gallery cell into its placeholder
+def create_image_cell(cell, image_file, image_bytes, content_type, image_details):
+    # Embed the original bytes directly; no decode/re-encode round trip
+    img_base64 = base64.b64encode(image_bytes).decode("utf-8")
+    title, description = image_details.get(
+        image_file, ("Untitled", "No description available.")
+    )
+    with cell.container():
+        st.markdown(
+            create_image_with_info(
+                img_base64,
+                title,
+                description.replace('\n', '<br>'),
+                content_type
+            ),
+            unsafe_allow_html=True
+        )
+        if st.button("View Details", key=f"btn_{image_file}"):
+            handle_click(image_file, title, description)
+
+# Function to create the image grid from FastAPI, one page at a time
 def create_image_grid(num_images_per_row=5):
     try:
-        response = requests.get(f"{API_BASE_URL}/list-images")
-        response.raise_for_status()
-        image_files = response.json()
-
+        page = list_images_page_from_fastapi(st.session_state.gallery_cursors[-1])
+        image_files = page["images"]
+
+        # Start fetching every thumbnail on the page in parallel (bounded by the shared pool); the
+        # plain api_client function is used because pool threads have no ScriptRunContext
+        executor = get_executor()
+        image_futures = {
+            executor.submit(fetch_thumbnail, image_file, THUMBNAIL_WIDTH): image_file
+            for image_file in image_files
+        }
+
+        # Lay out the grid first so cells can be filled in as their images arrive
+        cells = {}
         for i in range(0, len(image_files), num_images_per_row):
             cols = st.columns(num_images_per_row)
             for j, image_file in enumerate(image_files[i:i + num_images_per_row]):
                 with cols[j]:
-                    # Fetch image from FastAPI
-                    img = load_image_from_fastapi(image_file)
-                    if img:
-                        img_base64 = image_to_base64(img)
-                        # Fetch title and description from FastAPI
-                        title, description = get_image_details_from_fastapi(image_file)
-                        st.markdown(
-                            create_image_with_info(
-                                img_base64,
-                                title,
-                                description.replace('\n', '<br>')
-                            ),
-                            unsafe_allow_html=True
-                        )
-                        if st.button("View Details", key=f"btn_{image_file}"):
-                            handle_click(image_file, title, description)
+                    cells[image_file] = st.empty()
+
+        # Fetch title and description for all images at once while the thumbnails download
+        image_details = get_image_details_batch_from_fastapi(image_files)
+
+        for future in as_completed(image_futures):
+            image_file = image_futures[future]
+            try:
+                image_bytes, content_type = future.result()
+            except requests.RequestException as e:
+                cells[image_file].error(f"Error fetching image: {str(e)}")
+                continue
+            create_image_cell(cells[image_file], image_file, image_bytes, content_type, image_details)
+
+        create_page_controls(page)
     except requests.RequestException as e:
         st.error(f"Error fetching image list: {str(e)}")
         
-# Function to convert an image to base64
-def image_to_base64(image):
-    try:
-        buffered = BytesIO()
-        image.save(buffered, format="PNG")  # Save the image to the buffer in PNG format
-        return base64.b64encode(buffered.getvalue()).decode("utf-8")  # Encode the image to base64
-    except Exception as e:
-        st.error(f"Error converting image to base64: {str(e)}")
-        return None
-
-
 # Initialize session state variables if they don't exist
 if 'selected_image' not in st.session_state:
     st.session_state.selected_image = None
@@ -247,6 +250,9 @@ if 'selected_title' not in st.session_state:
     st.session_state.selected_title = None
 if 'selected_description' not in st.session_state:
     st.session_state.selected_description = None
+# Cursor used to fetch each visited gallery page; the last one is the current page
+if 'gallery_cursors' not in st.session_state:
+    st.session_state.gallery_cursors = [None]
 
 
 # Call the function to create the grid from FastAPI
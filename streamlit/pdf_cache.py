@@ -0,0 +1,224 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+import requests
+
+# Local, content-addressed cache of downloaded PDFs shared by every Streamlit session.
+# Files are stored by the SHA-256 of their bytes, so sessions never overwrite each other's
+# copy and a document that is already cached opens without touching the network.
+PDF_CACHE_DIR = os.getenv("PDF_CACHE_DIR", os.path.join(os.getcwd(), "vectorstore", "pdf_cache"))
+PDF_CACHE_MAX_BYTES = int(os.getenv("PDF_CACHE_MAX_BYTES", str(2 * 1024 * 1024 * 1024)))
+# Cached URLs older than this are revalidated with a conditional request (ETag)
+PDF_CACHE_MAX_AGE = float(os.getenv("PDF_CACHE_MAX_AGE", "86400"))
+PDF_DOWNLOAD_CHUNK_SIZE = int(os.getenv("PDF_DOWNLOAD_CHUNK_SIZE", str(256 * 1024)))
+PDF_DOWNLOAD_TIMEOUT = float(os.getenv("PDF_DOWNLOAD_TIMEOUT", "30"))
+# Attempts per download; each retry resumes from the bytes already on disk with a Range request
+PDF_DOWNLOAD_ATTEMPTS = int(os.getenv("PDF_DOWNLOAD_ATTEMPTS", "4"))
+
+
+class PDFDownloadError(Exception):
+    pass
+
+
+class PDFCache:
+    """Size-bounded LRU cache of PDFs keyed by URL and stored by content hash.
+
+    Downloads stream to a partial file in chunks; an interrupted transfer resumes from the
+    partial file with `Range` (guarded by `If-Range` so a changed object restarts cleanly).
+    """
+
+    def __init__(self, directory, max_bytes, session=None):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._blob_dir = os.path.join(directory, "blobs")
+        self._partial_dir = os.path.join(directory, "partial")
+        os.makedirs(self._blob_dir, exist_ok=True)
+        os.makedirs(self._partial_dir, exist_ok=True)
+        self._session = session or requests.Session()
+        self._lock = threading.Lock()
+        self._url_locks = {}
+        self._hits = 0
+        self._downloads = 0
+        self._resumes = 0
+        self._evictions = 0
+
+        self._conn = sqlite3.connect(os.path.join(directory, "index.sqlite3"), timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS documents (
+                url TEXT PRIMARY KEY,
+                sha256 TEXT NOT NULL,
+                etag TEXT,
+                size INTEGER NOT NULL,
+                fetched_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        self._conn.commit()
+
+    def blob_path(self, sha256):
+        return os.path.join(self._blob_dir, f"{sha256}.pdf")
+
+    def _url_lock(self, url):
+        with self._lock:
+            return self._url_locks.setdefault(url, threading.Lock())
+
+    def _lookup(self, url):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT sha256, etag, fetched_at FROM documents WHERE url = ?", (url,)
+            ).fetchone()
+
+    def _touch(self, url, fetched=False):
+        now = time.time()
+        with self._lock:
+            if fetched:
+                self._conn.execute("UPDATE documents SET last_access = ?, fetched_at = ? WHERE url = ?", (now, now, url))
+            else:
+                self._conn.execute("UPDATE documents SET last_access = ? WHERE url = ?", (now, url))
+            self._conn.commit()
+
+    def fetch(self, url):
+        """Return the local path of the PDF at `url`, downloading it only when it isn't cached."""
+        with self._url_lock(url):
+            row = self._lookup(url)
+            if row is not None and os.path.exists(self.blob_path(row[0])):
+                sha256, etag, fetched_at = row
+                if time.time() - fetched_at < PDF_CACHE_MAX_AGE or self._not_modified(url, etag):
+                    self._touch(url, fetched=time.time() - fetched_at >= PDF_CACHE_MAX_AGE)
+                    with self._lock:
+                        self._hits += 1
+                    return self.blob_path(sha256)
+            return self._download(url)
+
+    def _not_modified(self, url, etag):
+        if not etag:
+            return False
+        try:
+            response = self._session.head(url, headers={"If-None-Match": etag}, timeout=PDF_DOWNLOAD_TIMEOUT)
+        except requests.RequestException:
+            # Serve the cached copy when the origin can't be reached
+            return True
+        return response.status_code == 304 or response.headers.get("ETag") == etag
+
+    def _download(self, url):
+        partial_path = os.path.join(self._partial_dir, hashlib.sha1(url.encode("utf-8")).hexdigest() + ".part")
+        etag_path = partial_path + ".etag"
+        etag = None
+        if os.path.exists(etag_path):
+            with open(etag_path) as f:
+                etag = f.read().strip() or None
+
+        last_error = None
+        for attempt in range(PDF_DOWNLOAD_ATTEMPTS):
+            offset = os.path.getsize(partial_path) if os.path.exists(partial_path) and etag else 0
+            headers = {}
+            if offset:
+                headers = {"Range": f"bytes={offset}-", "If-Range": etag}
+            try:
+                with self._session.get(url, headers=headers, stream=True, timeout=PDF_DOWNLOAD_TIMEOUT) as response:
+                    if response.status_code == 416:
+                        # The partial file already holds the whole object
+                        break
+                    response.raise_for_status()
+                    if response.status_code != 206:
+                        offset = 0
+                    elif offset:
+                        with self._lock:
+                            self._resumes += 1
+                    etag = response.headers.get("ETag")
+                    with open(etag_path, "w") as f:
+                        f.write(etag or "")
+                    with open(partial_path, "r+b" if offset else "wb") as f:
+                        f.seek(offset)
+                        f.truncate()
+                        for chunk in response.iter_content(chunk_size=PDF_DOWNLOAD_CHUNK_SIZE):
+                            f.write(chunk)
+                break
+            except requests.HTTPError as e:
+                raise PDFDownloadError(f"Failed to download {url}: HTTP {e.response.status_code}") from e
+            except requests.RequestException as e:
+                last_error = e
+                time.sleep(min(2 ** attempt, 10))
+        else:
+            raise PDFDownloadError(f"Failed to download {url} after {PDF_DOWNLOAD_ATTEMPTS} attempts: {last_error}")
+
+        return self._publish(url, partial_path, etag_path, etag)
+
+    def _publish(self, url, partial_path, etag_path, etag):
+        """Move a completed download to its content-addressed path and record it."""
+        sha256 = hashlib.sha256()
+        with open(partial_path, "rb") as f:
+            for chunk in iter(lambda: f.read(PDF_DOWNLOAD_CHUNK_SIZE), b""):
+                sha256.update(chunk)
+        digest = sha256.hexdigest()
+        size = os.path.getsize(partial_path)
+        path = self.blob_path(digest)
+        if os.path.exists(path):
+            os.remove(partial_path)
+        else:
+            os.replace(partial_path, path)
+        if os.path.exists(etag_path):
+            os.remove(etag_path)
+
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO documents (url, sha256, etag, size, fetched_at, last_access) VALUES (?, ?, ?, ?, ?, ?)",
+                (url, digest, etag, size, now, now)
+            )
+            self._downloads += 1
+            self._evict(keep=digest)
+            self._conn.commit()
+        return path
+
+    def _evict(self, keep):
+        """Delete least recently used blobs until the cache fits; caller holds the lock."""
+        rows = self._conn.execute(
+            "SELECT sha256, MAX(size), MAX(last_access) FROM documents GROUP BY sha256 ORDER BY MAX(last_access)"
+        ).fetchall()
+        total = sum(size for _, size, _ in rows)
+        for sha256, size, _ in rows:
+            if total <= self.max_bytes:
+                break
+            if sha256 == keep:
+                continue
+            self._conn.execute("DELETE FROM documents WHERE sha256 = ?", (sha256,))
+            try:
+                os.remove(self.blob_path(sha256))
+            except FileNotFoundError:
+                pass
+            total -= size
+            self._evictions += 1
+
+    def stats(self):
+        with self._lock:
+            entries, total = self._conn.execute(
+                "SELECT COUNT(DISTINCT sha256), COALESCE(SUM(size), 0) FROM (SELECT sha256, MAX(size) AS size FROM documents GROUP BY sha256)"
+            ).fetchone()
+            return {
+                "documents": entries,
+                "bytes": total,
+                "max_bytes": self.max_bytes,
+                "hits": self._hits,
+                "downloads": self._downloads,
+                "resumed_downloads": self._resumes,
+                "evictions": self._evictions,
+            }
+
+
+_pdf_cache = None
+_pdf_cache_lock = threading.Lock()
+
+
+def get_pdf_cache():
+    """Return the process-wide PDF cache."""
+    global _pdf_cache
+    if _pdf_cache is None:
+        with _pdf_cache_lock:
+            if _pdf_cache is None:
+                _pdf_cache = PDFCache(PDF_CACHE_DIR, PDF_CACHE_MAX_BYTES)
+    return _pdf_cache
@@ -0,0 +1,131 @@
+import os
+import re
+from typing import List
+
+from llama_index.core import Settings
+from llama_index.core.base.base_retriever import BaseRetriever
+from llama_index.core.base.response.schema import StreamingResponse
+from llama_index.core.query_engine import RetrieverQueryEngine
+from llama_index.core.schema import NodeWithScore, QueryBundle
+
+from answer_cache import get_answer_cache
+from indexing import document_filters, get_document_sparse_index
+from retrieval_cache import get_retrieval_cache
+from sparse_index import reciprocal_rank_fusion
+
+# Chunks handed to the LLM per question with dense-only retrieval
+SIMILARITY_TOP_K = 10
+
+# "hybrid" fuses BM25 and vector results with reciprocal rank fusion; "dense" is vector search only
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "hybrid").lower()
+# Hybrid retrieval finds exact tickers/figures that dense search misses, so fewer chunks are needed
+HYBRID_TOP_K = int(os.getenv("HYBRID_TOP_K", "6"))
+# Candidates taken from each of the dense and sparse rankings before fusion
+HYBRID_CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", "20"))
+RRF_K = int(os.getenv("RRF_K", "60"))
+
+
+class CachedRetriever(BaseRetriever):
+    """Retriever scoped to one document that reuses cached query embeddings and results.
+
+    In "hybrid" mode the vector ranking is fused with the document's BM25 ranking; in
+    "dense" mode it is plain vector search. Cached node sets are keyed by the document's
+    `content_hash`, so a re-index done by another process (the ingestion DAG) is never
+    answered from the previous version's results.
+    """
+
+    def __init__(self, index, pdf_key, content_hash=None, similarity_top_k=None, mode=None, cache=None, embed_model=None):
+        super().__init__()
+        self._pdf_key = pdf_key
+        self._content_hash = content_hash
+        self._mode = mode or RETRIEVAL_MODE
+        hybrid = self._mode == "hybrid"
+        self._similarity_top_k = similarity_top_k or (HYBRID_TOP_K if hybrid else SIMILARITY_TOP_K)
+        self._cache = cache or get_retrieval_cache()
+        self._embed_model = embed_model or Settings.embed_model
+        self._model_name = f"{self._embed_model.class_name()}:{self._embed_model.model_name}"
+        self._retriever = index.as_retriever(
+            similarity_top_k=max(HYBRID_CANDIDATES, self._similarity_top_k) if hybrid else self._similarity_top_k,
+            filters=document_filters(pdf_key)
+        )
+
+    def embed_query(self, query_str):
+        """Query embedding, served from the cache when this question was embedded before."""
+        embedding = self._cache.get_embedding(self._model_name, query_str)
+        if embedding is None:
+            embedding = self._embed_model.get_agg_embedding_from_queries([query_str])
+            self._cache.put_embedding(self._model_name, query_str, embedding)
+        return embedding
+
+    def _hybrid(self, query_str, dense_nodes):
+        content_hash = self._content_hash or (dense_nodes[0].node.metadata.get("content_hash") if dense_nodes else None)
+        sparse_index = get_document_sparse_index(self._pdf_key, content_hash)
+        if sparse_index is None:
+            return dense_nodes[:self._similarity_top_k]
+        sparse_nodes = sparse_index.search(query_str, HYBRID_CANDIDATES)
+        return reciprocal_rank_fusion([dense_nodes, sparse_nodes], self._similarity_top_k, k=RRF_K)
+
+    def _retrieve(self, query_bundle: QueryBundle) -> List[NodeWithScore]:
+        variant = (self._content_hash, self._similarity_top_k, self._mode)
+        nodes = self._cache.get_nodes(self._pdf_key, query_bundle.query_str, *variant)
+        if nodes is not None:
+            return nodes
+        if query_bundle.embedding is None:
+            query_bundle.embedding = self.embed_query(query_bundle.query_str)
+        nodes = self._retriever.retrieve(query_bundle)
+        if self._mode == "hybrid":
+            nodes = self._hybrid(query_bundle.query_str, nodes)
+        # The store may already hold a newer version than this session opened; don't file it under the old one
+        if self._content_hash is None or all(n.node.metadata.get("content_hash") == self._content_hash for n in nodes):
+            self._cache.put_nodes(self._pdf_key, query_bundle.query_str, nodes, *variant)
+        return nodes
+
+
+class SemanticCacheQueryEngine:
+    """Streaming query engine that answers paraphrased questions from the semantic answer cache.
+
+    The question is embedded once (through the retrieval cache); a close enough cached answer for the
+    same document version is replayed as a token stream, otherwise the wrapped engine runs and its
+    answer is cached once the stream has been fully consumed.
+    """
+
+    def __init__(self, query_engine, retriever, pdf_key, content_hash=None, answer_cache=None):
+        self._query_engine = query_engine
+        self._retriever = retriever
+        self._pdf_key = pdf_key
+        self._content_hash = content_hash
+        self._answer_cache = answer_cache or get_answer_cache()
+
+    def query(self, query_str):
+        embedding = self._retriever.embed_query(query_str)
+        cached = self._answer_cache.lookup(embedding, query_str, self._pdf_key, self._content_hash)
+        if cached is not None:
+            answer, source_nodes, similarity = cached
+            return StreamingResponse(
+                response_gen=iter(re.findall(r"\s*\S+", answer)),
+                source_nodes=source_nodes,
+                metadata={"semantic_cache_similarity": similarity},
+            )
+
+        response = self._query_engine.query(QueryBundle(query_str, embedding=embedding))
+
+        def record(tokens):
+            answer = ""
+            for token in tokens:
+                answer += token
+                yield token
+            sources_current = self._content_hash is None or all(
+                n.node.metadata.get("content_hash") == self._content_hash for n in response.source_nodes
+            )
+            if answer.strip() and sources_current:
+                self._answer_cache.put(embedding, query_str, self._pdf_key, answer, response.source_nodes, self._content_hash)
+
+        response.response_gen = record(response.response_gen)
+        return response
+
+
+def build_query_engine(index, pdf_key, content_hash=None, similarity_top_k=None):
+    """Streaming query engine over a single document's chunks, backed by the retrieval and answer caches."""
+    retriever = CachedRetriever(index, pdf_key, content_hash, similarity_top_k=similarity_top_k)
+    query_engine = RetrieverQueryEngine.from_args(retriever, streaming=True)
+    return SemanticCacheQueryEngine(query_engine, retriever, pdf_key, content_hash)
@@ -0,0 +1,151 @@
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+# In-process cache of query embeddings and retrieved node sets, shared by every Streamlit session.
+# Module-level state survives reruns, so analysts repeating a question skip the embed + vector search.
+RETRIEVAL_CACHE_MAX_ENTRIES = int(os.getenv("RETRIEVAL_CACHE_MAX_ENTRIES", "1024"))
+RETRIEVAL_CACHE_TTL = float(os.getenv("RETRIEVAL_CACHE_TTL", "3600"))
+RETRIEVAL_CACHE_ENABLED = os.getenv("RETRIEVAL_CACHE_ENABLED", "true").lower() == "true"
+
+
+def normalize_query(query):
+    """Case-fold, collapse whitespace and drop trailing punctuation so trivial variants share an entry."""
+    return re.sub(r"\s+", " ", query).strip().lower().rstrip("?!.")
+
+
+class _LRU:
+    """OrderedDict-backed LRU with per-entry expiry; callers hold the lock."""
+
+    def __init__(self, max_entries, ttl):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None or entry[0] < time.time():
+            if entry is not None:
+                del self.entries[key]
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key, value):
+        self.entries[key] = (time.time() + self.ttl, value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+        }
+
+
+class RetrievalCache:
+    """LRU + TTL cache of query embeddings (per model) and retrieved nodes (per document).
+
+    Node sets are keyed by (pdf_key, normalized query, content_hash, top_k, retrieval mode), so
+    a new version of a document never hits entries from the old one even when it was re-indexed
+    in another process; `invalidate(pdf_key)` additionally frees them early in the indexing process.
+    """
+
+    def __init__(self, max_entries, ttl):
+        self._lock = threading.Lock()
+        self._embeddings = _LRU(max_entries, ttl)
+        self._nodes = _LRU(max_entries, ttl)
+
+    def get_embedding(self, model_name, query):
+        with self._lock:
+            return self._embeddings.get((model_name, normalize_query(query)))
+
+    def put_embedding(self, model_name, query, embedding):
+        with self._lock:
+            self._embeddings.put((model_name, normalize_query(query)), embedding)
+
+    def get_nodes(self, pdf_key, query, *variant):
+        with self._lock:
+            nodes = self._nodes.get((pdf_key, normalize_query(query)) + variant)
+        return list(nodes) if nodes is not None else None
+
+    def put_nodes(self, pdf_key, query, nodes, *variant):
+        with self._lock:
+            self._nodes.put((pdf_key, normalize_query(query)) + variant, list(nodes))
+
+    def invalidate(self, pdf_key=None):
+        """Drop cached node sets for one document, or everything when pdf_key is None."""
+        with self._lock:
+            if pdf_key is None:
+                self._nodes.entries.clear()
+                self._embeddings.entries.clear()
+                return
+            for key in [key for key in self._nodes.entries if key[0] == pdf_key]:
+                del self._nodes.entries[key]
+
+    def stats(self):
+        with self._lock:
+            return {"embeddings": self._embeddings.stats(), "nodes": self._nodes.stats()}
+
+
+class _DisabledRetrievalCache:
+    """Stand-in used when RETRIEVAL_CACHE_ENABLED is false; never stores anything."""
+
+    def get_embedding(self, model_name, query):
+        return None
+
+    def put_embedding(self, model_name, query, embedding):
+        pass
+
+    def get_nodes(self, pdf_key, query, *variant):
+        return None
+
+    def put_nodes(self, pdf_key, query, nodes, *variant):
+        pass
+
+    def invalidate(self, pdf_key=None):
+        pass
+
+    def stats(self):
+        return {"enabled": False}
+
+
+_retrieval_cache = None
+_retrieval_cache_lock = threading.Lock()
+
+
+def get_retrieval_cache():
+    """Return the process-wide retrieval cache."""
+    global _retrieval_cache
+    if _retrieval_cache is None:
+        with _retrieval_cache_lock:
+            if _retrieval_cache is None:
+                if RETRIEVAL_CACHE_ENABLED:
+                    _retrieval_cache = RetrievalCache(RETRIEVAL_CACHE_MAX_ENTRIES, RETRIEVAL_CACHE_TTL)
+                else:
+                    _retrieval_cache = _DisabledRetrievalCache()
+    return _retrieval_cache
+
+
+def format_cache_stats(stats):
+    """One-line summary for the terminal output pane."""
+    if not stats.get("embeddings"):
+        return "Retrieval cache: disabled"
+    return (
+        f"Retrieval cache: nodes {stats['nodes']['hits']}/{stats['nodes']['hits'] + stats['nodes']['misses']} hits, "
+        f"embeddings {stats['embeddings']['hits']}/{stats['embeddings']['hits'] + stats['embeddings']['misses']} hits, "
+        f"{stats['nodes']['entries']} node sets cached"
+    )
@@ -0,0 +1,198 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import uuid
+from collections import Counter, OrderedDict
+
+import numpy as np
+from llama_index.core.schema import MetadataMode, NodeWithScore, TextNode
+
+# Per-document BM25 indexes live next to the other local caches
+SPARSE_INDEX_PATH = os.getenv("SPARSE_INDEX_PATH", os.path.join(os.getcwd(), "vectorstore", "sparse"))
+# Loaded indexes kept in memory across Streamlit reruns
+SPARSE_INDEX_CACHE_ENTRIES = int(os.getenv("SPARSE_INDEX_CACHE_ENTRIES", "16"))
+
+# Keeps tickers, fund names and numbers such as "s&p", "3.5" or "2023-24" as single terms
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[.&'\-/][a-z0-9]+)*")
+MAX_TOKEN_LENGTH = 40
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the this to was were which with".split()
+)
+
+
+def tokenize(text):
+    return [
+        token for token in TOKEN_PATTERN.findall(text.lower())
+        if token not in STOPWORDS and len(token) <= MAX_TOKEN_LENGTH
+    ]
+
+
+class BM25Index:
+    """Okapi BM25 over a document's chunks, with postings stored as flat NumPy arrays.
+
+    Term t's postings are `postings[offsets[t]:offsets[t + 1]]` (chunk rows) with matching
+    `term_freqs`, so a query touches only the slices of its own terms.
+    """
+
+    def __init__(self, terms, offsets, postings, term_freqs, doc_lengths, nodes, content_hash=None, k1=1.2, b=0.75):
+        self.terms = terms
+        self.offsets = offsets
+        self.postings = postings
+        self.term_freqs = term_freqs
+        self.doc_lengths = doc_lengths
+        self.nodes = nodes
+        self.content_hash = content_hash
+        self.k1 = k1
+        self._term_ids = {term: i for i, term in enumerate(terms.tolist())}
+
+        doc_count = len(doc_lengths)
+        doc_freqs = np.diff(offsets).astype(np.float32)
+        self._idf = np.log1p((doc_count - doc_freqs + 0.5) / (doc_freqs + 0.5)).astype(np.float32)
+        avg_length = float(doc_lengths.mean()) if doc_count else 0.0
+        self._length_norm = (k1 * (1 - b + b * doc_lengths / max(avg_length, 1e-9))).astype(np.float32)
+
+    @classmethod
+    def build(cls, nodes, content_hash=None):
+        """Index the raw text of each node (metadata excluded)."""
+        counts = [Counter(tokenize(node.get_content(metadata_mode=MetadataMode.NONE))) for node in nodes]
+        terms = np.array(sorted(set().union(*counts)) if counts else [], dtype=str)
+        term_ids = {term: i for i, term in enumerate(terms.tolist())}
+
+        term_column, doc_column, freq_column = [], [], []
+        for row, counter in enumerate(counts):
+            for term, freq in counter.items():
+                term_column.append(term_ids[term])
+                doc_column.append(row)
+                freq_column.append(freq)
+        term_column = np.asarray(term_column, dtype=np.int32)
+        order = np.argsort(term_column, kind="stable")
+
+        return cls(
+            terms=terms,
+            offsets=np.searchsorted(term_column[order], np.arange(len(terms) + 1)).astype(np.int64),
+            postings=np.asarray(doc_column, dtype=np.int32)[order],
+            term_freqs=np.minimum(np.asarray(freq_column, dtype=np.int64), np.iinfo(np.uint16).max).astype(np.uint16)[order],
+            doc_lengths=np.asarray([sum(counter.values()) for counter in counts], dtype=np.float32),
+            nodes=list(nodes),
+            content_hash=content_hash,
+        )
+
+    def search(self, query, top_k):
+        """Return up to `top_k` NodeWithScore, best BM25 score first; chunks sharing no term are skipped."""
+        scores = np.zeros(len(self.doc_lengths), dtype=np.float32)
+        for term in set(tokenize(query)):
+            term_id = self._term_ids.get(term)
+            if term_id is None:
+                continue
+            start, end = self.offsets[term_id], self.offsets[term_id + 1]
+            rows = self.postings[start:end]
+            freqs = self.term_freqs[start:end].astype(np.float32)
+            scores[rows] += self._idf[term_id] * freqs * (self.k1 + 1) / (freqs + self._length_norm[rows])
+
+        matched = np.flatnonzero(scores)
+        if matched.size > top_k:
+            matched = matched[np.argpartition(-scores[matched], top_k)[:top_k]]
+        matched = matched[np.argsort(-scores[matched])]
+        return [NodeWithScore(node=self.nodes[row], score=float(scores[row])) for row in matched]
+
+    def save(self, path):
+        nodes_blob = json.dumps([node.to_json() for node in self.nodes]).encode("utf-8")
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp.npz"
+        np.savez(
+            tmp_path, terms=self.terms, offsets=self.offsets, postings=self.postings, term_freqs=self.term_freqs,
+            doc_lengths=self.doc_lengths, nodes=np.frombuffer(nodes_blob, dtype=np.uint8),
+            content_hash=np.array(self.content_hash or "")
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            nodes = [TextNode.from_json(node_json) for node_json in json.loads(data["nodes"].tobytes().decode("utf-8"))]
+            return cls(
+                terms=data["terms"], offsets=data["offsets"], postings=data["postings"],
+                term_freqs=data["term_freqs"], doc_lengths=data["doc_lengths"], nodes=nodes,
+                content_hash=str(data["content_hash"]) or None,
+            )
+
+
+def sparse_index_path(namespace, pdf_key, content_hash):
+    """File for one version of a document, under a directory per vector store backend and collection.
+
+    The namespace keeps indexes built from different embedding collections apart, and the content
+    hash in the name means a new version of the PDF never picks up the old version's index.
+    """
+    return os.path.join(SPARSE_INDEX_PATH, namespace, f"{_document_prefix(pdf_key)}-{content_hash}.npz")
+
+
+def _document_prefix(pdf_key):
+    return hashlib.sha1(pdf_key.encode("utf-8")).hexdigest()[:20]
+
+
+_loaded = OrderedDict()
+_loaded_lock = threading.Lock()
+
+
+def _remember(key, index):
+    with _loaded_lock:
+        _loaded[key] = index
+        _loaded.move_to_end(key)
+        while len(_loaded) > SPARSE_INDEX_CACHE_ENTRIES:
+            _loaded.popitem(last=False)
+
+
+def save_sparse_index(namespace, pdf_key, index):
+    path = sparse_index_path(namespace, pdf_key, index.content_hash)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    index.save(path)
+    _remember((namespace, pdf_key, index.content_hash), index)
+
+
+def load_sparse_index(namespace, pdf_key, content_hash):
+    """Return this version's BM25 index from memory or disk, or None if it was never built."""
+    key = (namespace, pdf_key, content_hash)
+    with _loaded_lock:
+        index = _loaded.get(key)
+        if index is not None:
+            _loaded.move_to_end(key)
+            return index
+    path = sparse_index_path(namespace, pdf_key, content_hash)
+    if not os.path.exists(path):
+        return None
+    index = BM25Index.load(path)
+    _remember(key, index)
+    return index
+
+
+def delete_sparse_index(namespace, pdf_key):
+    """Remove every version of the document's index in this namespace."""
+    with _loaded_lock:
+        for key in [key for key in _loaded if key[:2] == (namespace, pdf_key)]:
+            del _loaded[key]
+    directory = os.path.join(SPARSE_INDEX_PATH, namespace)
+    prefix = _document_prefix(pdf_key) + "-"
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return
+    for name in names:
+        if name.startswith(prefix) and name.endswith(".npz"):
+            try:
+                os.remove(os.path.join(directory, name))
+            except FileNotFoundError:
+                pass
+
+
+def reciprocal_rank_fusion(result_lists, top_k, k=60):
+    """Fuse ranked NodeWithScore lists by summing 1 / (k + rank); the fused score replaces the original."""
+    fused = {}
+    nodes = {}
+    for results in result_lists:
+        for rank, result in enumerate(results, start=1):
+            node_id = result.node.node_id
+            fused[node_id] = fused.get(node_id, 0.0) + 1.0 / (k + rank)
+            nodes.setdefault(node_id, result.node)
+    ranked = sorted(fused.items(), key=lambda item: item[1], reverse=True)[:top_k]
+    return [NodeWithScore(node=nodes[node_id], score=score) for node_id, score in ranked]
@@ -1,10 +1,29 @@
 import os
 import base64
+import threading
 import fitz
 from io import BytesIO
 from PIL import Image
-import requests
-from llama_index.llms.nvidia import NVIDIA
+from description_cache import get_description_cache
+from nvidia_client import NVIDIA_CHAT_COMPLETIONS_URL, get_nvidia_client
+
+NEVA_MODEL = "nvidia/neva-22b"
+DEPLOT_MODEL = "google/deplot"
+GRAPH_EXPLAIN_MODEL = "meta/llama-3.1-405b-instruct"
+
+DESCRIBE_IMAGE_PROMPT = "Describe what you see in this image."
+DEPLOT_PROMPT = "Generate underlying data table of the figure below:"
+GRAPH_EXPLAIN_PROMPT = "Your responsibility is to explain charts. You are an expert in describing the responses of linearized tables into plain English text for LLMs to use. Explain the following linearized table. "
+
+# Description requests each thread actually sent; cache hits never reach the _*_remote helpers
+_remote_calls = threading.local()
+
+def remote_calls_sent():
+    """Remote description requests sent so far by the calling thread."""
+    return getattr(_remote_calls, "count", 0)
+
+def _count_remote_call():
+    _remote_calls.count = remote_calls_sent() + 1
 
 def set_environment_variables():
     """Set necessary environment variables."""
@@ -19,81 +38,104 @@ def get_b64_image_from_content(image_content):
     img.save(buffered, format="JPEG")
     return base64.b64encode(buffered.getvalue()).decode("utf-8")
 
-def is_graph(image_content):
-    """Determine if an image is a graph, plot, chart, or table."""
-    res = describe_image(image_content)
-    return any(keyword in res.lower() for keyword in ["graph", "plot", "chart", "table"])
+GRAPH_KEYWORDS = ["graph", "plot", "chart", "table"]
+
+def classify_image(image_content):
+    """Cheap local chart/photo classification from pixel statistics.
+
+    Charts and tables are dominated by a flat background and a handful of colours;
+    photographs and cover art spread over many colours. Returns "chart", "photo",
+    or None when the statistics are inconclusive."""
+    img = Image.open(BytesIO(image_content))
+    img.draft("RGB", (256, 256))
+    img = img.convert("RGB")
+    img.thumbnail((128, 128))
+    total = img.width * img.height
+
+    # 16 levels per channel; getcolors returns None past 256 distinct colours
+    colors = img.point(lambda v: v & 0xF0).getcolors(maxcolors=256)
+    if colors is None:
+        return "photo"
+
+    counts = sorted((count for count, _ in colors), reverse=True)
+    dominant = counts[0] / total
+    covered = 0
+    colors_for_95 = 0
+    for count in counts:
+        covered += count
+        colors_for_95 += 1
+        if covered >= 0.95 * total:
+            break
+
+    if dominant >= 0.45 and colors_for_95 <= 12:
+        return "chart"
+    if dominant < 0.2 and colors_for_95 > 48:
+        return "photo"
+    return None
+
+def describe_figure(image_content):
+    """Describe an image, spending as few remote calls as possible.
+
+    Returns (description, remote_calls, baseline_calls). remote_calls counts the requests
+    actually sent (description cache hits excluded); baseline_calls is what the uncached
+    always-describe-then-classify flow (neva, then DePlot + LLM for graphs) would cost."""
+    sent_before = remote_calls_sent()
+    classification = classify_image(image_content)
+    if classification == "photo":
+        return " ", 0, 1
+    if classification == "chart":
+        return process_graph(image_content), remote_calls_sent() - sent_before, 3
+
+    # Inconclusive: ask neva, and keep its description as the caption if it isn't a graph
+    description = describe_image(image_content)
+    if any(keyword in description.lower() for keyword in GRAPH_KEYWORDS):
+        return process_graph(image_content), remote_calls_sent() - sent_before, 3
+    return description, remote_calls_sent() - sent_before, 1
 
 def process_graph(image_content):
     """Process a graph image and generate a description."""
     deplot_description = process_graph_deplot(image_content)
-    mixtral = NVIDIA(model_name="meta/llama-3.1-405b-instruct")
-    response = mixtral.complete("Your responsibility is to explain charts. You are an expert in describing the responses of linearized tables into plain English text for LLMs to use. Explain the following linearized table. " + deplot_description)
-    return response.text
+    # Keyed on the linearized table, so the same figure is only explained once
+    return get_description_cache().get_or_compute(
+        deplot_description, GRAPH_EXPLAIN_MODEL, GRAPH_EXPLAIN_PROMPT, lambda: _explain_graph_remote(deplot_description)
+    )
+
+def _explain_graph_remote(deplot_description):
+    _count_remote_call()
+    return get_nvidia_client().chat(
+        NVIDIA_CHAT_COMPLETIONS_URL, GRAPH_EXPLAIN_PROMPT + deplot_description,
+        model=GRAPH_EXPLAIN_MODEL, max_tokens=1024, temperature=0.20, top_p=0.70
+    )
 
 def describe_image(image_content):
-    """Generate a description of an image using NVIDIA API."""
+    """Generate a description of an image using NVIDIA API (cached by image content)."""
+    return get_description_cache().get_or_compute(
+        image_content, NEVA_MODEL, DESCRIBE_IMAGE_PROMPT, lambda: _describe_image_remote(image_content)
+    )
+
+def _describe_image_remote(image_content):
+    _count_remote_call()
     image_b64 = get_b64_image_from_content(image_content)
-    invoke_url = "https://ai.api.nvidia.com/v1/vlm/nvidia/neva-22b"
-    api_key = os.getenv("NVIDIA_API_KEY")
-    
-    if not api_key:
-        raise ValueError("NVIDIA API Key is not set. Please set the NVIDIA_API_KEY environment variable.")
-
-    headers = {
-        "Authorization": f"Bearer {api_key}",
-        "Accept": "application/json"
-    }
-
-    payload = {
-        "messages": [
-            {
-                "role": "user",
-                "content": f'Describe what you see in this image. <img src="data:image/png;base64,{image_b64}" />'
-            }
-        ],
-        "max_tokens": 1024,
-        "temperature": 0.20,
-        "top_p": 0.70,
-        "seed": 0,
-        "stream": False
-    }
-
-    response = requests.post(invoke_url, headers=headers, json=payload)
-    response.raise_for_status()
-    print(response.json())
-    return response.json()["choices"][0]['message']['content']
+    return get_nvidia_client().chat(
+        f"vlm/{NEVA_MODEL}",
+        f'{DESCRIBE_IMAGE_PROMPT} <img src="data:image/png;base64,{image_b64}" />',
+        max_tokens=1024, temperature=0.20, top_p=0.70, seed=0
+    )
 
 def process_graph_deplot(image_content):
-    """Process a graph image using NVIDIA's Deplot API."""
-    invoke_url = "https://ai.api.nvidia.com/v1/vlm/google/deplot"
+    """Process a graph image using NVIDIA's Deplot API (cached by image content)."""
+    return get_description_cache().get_or_compute(
+        image_content, DEPLOT_MODEL, DEPLOT_PROMPT, lambda: _process_graph_deplot_remote(image_content)
+    )
+
+def _process_graph_deplot_remote(image_content):
+    _count_remote_call()
     image_b64 = get_b64_image_from_content(image_content)
-    api_key = os.getenv("NVIDIA_API_KEY")
-    
-    if not api_key:
-        raise ValueError("NVIDIA API Key is not set. Please set the NVIDIA_API_KEY environment variable.")
-
-    headers = {
-        "Authorization": f"Bearer {api_key}",
-        "Accept": "application/json"
-    }
-
-    payload = {
-        "messages": [
-            {
-                "role": "user",
-                "content": f'Generate underlying data table of the figure below: <img src="data:image/png;base64,{image_b64}" />'
-            }
-        ],
-        "max_tokens": 1024,
-        "temperature": 0.20,
-        "top_p": 0.20,
-        "stream": False
-    }
-
-    response = requests.post(invoke_url, headers=headers, json=payload)
-    print(response.json())
-    return response.json()["choices"][0]['message']['content']
+    return get_nvidia_client().chat(
+        f"vlm/{DEPLOT_MODEL}",
+        f'{DEPLOT_PROMPT} <img src="data:image/png;base64,{image_b64}" />',
+        max_tokens=1024, temperature=0.20, top_p=0.20
+    )
 
 def extract_text_around_item(text_blocks, bbox, page_height, threshold_percentage=0.1):
     """Extract text above and below a given bounding box on a page."""